@@ -0,0 +1,121 @@
+import pygame
+import threading
+import time
+from enum import Enum
+from config import Config, SoundKey, default_config
+
+
+class AssetKey(Enum):
+    LARGE_FONT = "large-font"
+    BASE_FONT = "base-font"
+    GAME_ICON = "game-icon"
+    SPRITESHEET = "spritesheet"
+
+
+class AssetRegistry:
+    """
+    Loads every game asset exactly once and shares it.
+
+    The manifest is built from the sound, font, asset and display configs.
+    Assets can be loaded on demand, all at once, or by a background thread
+    while the main menu is already on screen; `load_times` records how long
+    each one took in milliseconds.
+    """
+
+    def __init__(self, config: Config | None = None) -> None:
+        if config is None:
+            config = default_config()
+        font_config = config.font
+
+        # Fonts first since the main menu needs them for its first frame
+        self.manifest: dict[AssetKey | SoundKey, tuple[str, tuple]] = {
+            AssetKey.LARGE_FONT: (
+                "font",
+                (font_config.font_path, font_config.large_font_size),
+            ),
+            AssetKey.BASE_FONT: (
+                "font",
+                (font_config.font_path, font_config.base_font_size),
+            ),
+            AssetKey.GAME_ICON: ("image", (config.display.game_icon_path,)),
+            AssetKey.SPRITESHEET: ("image", (config.asset.spritesheet_path,)),
+        }
+        for key, path in config.sound.paths().items():
+            self.manifest[key] = ("sound", (path,))
+
+        self.assets: dict[AssetKey | SoundKey, object] = {}
+        self.load_times: dict[AssetKey | SoundKey, float] = {}
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+        self.error: BaseException | None = None
+
+    def get(self, key: AssetKey | SoundKey):
+        asset = self.assets.get(key)
+        if asset is not None:
+            return asset
+        with self.lock:
+            # Another thread may have finished it while we waited
+            if key not in self.assets:
+                self.assets[key] = self.load(key)
+            return self.assets[key]
+
+    def load(self, key: AssetKey | SoundKey):
+        if key not in self.manifest:
+            raise Exception(f"Asset not found for key {key}")
+        kind, args = self.manifest[key]
+        start = time.perf_counter()
+        match kind:
+            case "font":
+                asset = pygame.font.Font(*args)
+            case "image":
+                # Converted to the display format by whoever draws it, on the main thread
+                asset = pygame.image.load(*args)
+            case "sound":
+                asset = pygame.mixer.Sound(*args)
+        self.load_times[key] = (time.perf_counter() - start) * 1000
+        return asset
+
+    def is_loaded(self, key: AssetKey | SoundKey | None = None) -> bool:
+        if key is not None:
+            return key in self.assets
+        return all(key in self.assets for key in self.loadable_keys())
+
+    def loadable_keys(self) -> list[AssetKey | SoundKey]:
+        # Sounds need the mixer, headless runs skip them
+        has_mixer = pygame.mixer.get_init() is not None
+        return [
+            key
+            for key, (kind, _) in self.manifest.items()
+            if kind != "sound" or has_mixer
+        ]
+
+    def load_all(self):
+        for key in self.loadable_keys():
+            self.get(key)
+
+    def start_background_load(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(
+            target=self.background_load, name="asset-loader", daemon=True
+        )
+        self.thread.start()
+
+    def background_load(self):
+        try:
+            self.load_all()
+        except BaseException as e:
+            self.error = e
+
+    def wait(self):
+        """Block until every asset is loaded, re-raising background failures."""
+        if self.thread is not None:
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+        self.load_all()
+
+    def report(self) -> list[str]:
+        return [
+            f"{key.value}: {millis:.2f} ms" for key, millis in self.load_times.items()
+        ]
@@ -0,0 +1,101 @@
+import pygame
+from assets import AssetRegistry
+from config import Config, SoundKey, default_config
+
+
+class NullAudioBackend:
+    """Backend that plays nothing, for headless runs."""
+
+    def reserve_channels(self, count: int):
+        pass
+
+    def load(self, key: SoundKey, path: str):
+        pass
+
+    def play(self, key: SoundKey, channel: int):
+        pass
+
+    def is_busy(self, channel: int) -> bool:
+        return False
+
+
+class PygameAudioBackend:
+    def __init__(self, assets: AssetRegistry | None = None) -> None:
+        self.assets = assets
+        self.sounds: dict[SoundKey, pygame.mixer.Sound] = {}
+        self.channels: list[pygame.mixer.Channel] = []
+
+    def reserve_channels(self, count: int):
+        # Reserved channels are never picked by Sound.play, so the pool is ours
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), count))
+        pygame.mixer.set_reserved(count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(count)]
+
+    def load(self, key: SoundKey, path: str):
+        if self.assets is not None:
+            self.sounds[key] = self.assets.get(key)
+        else:
+            self.sounds[key] = pygame.mixer.Sound(path)
+
+    def play(self, key: SoundKey, channel: int):
+        self.channels[channel].play(self.sounds[key])
+
+    def is_busy(self, channel: int) -> bool:
+        return self.channels[channel].get_busy()
+
+
+class AudioManager:
+    """
+    Sits between game logic and the mixer.
+
+    Play requests made during a tick are coalesced and issued on `flush`.
+    Each sound owns a fixed slice of a reserved channel pool, which caps
+    how many voices of it can overlap.
+    """
+
+    def __init__(
+        self,
+        backend: NullAudioBackend | PygameAudioBackend | None = None,
+        config: Config | None = None,
+        voice_limit: int = 2,
+        assets: AssetRegistry | None = None,
+    ) -> None:
+        if config is None:
+            config = default_config()
+        if backend is None:
+            backend = (
+                PygameAudioBackend(assets)
+                if pygame.mixer.get_init()
+                else NullAudioBackend()
+            )
+        self.backend = backend
+
+        sound_config = config.sound.paths()
+        self.voices: dict[SoundKey, list[int]] = {}
+        self.next_voice: dict[SoundKey, int] = {}
+        backend.reserve_channels(len(sound_config) * voice_limit)
+        for index, (key, path) in enumerate(sound_config.items()):
+            backend.load(key, path)
+            first = index * voice_limit
+            self.voices[key] = list(range(first, first + voice_limit))
+            self.next_voice[key] = 0
+
+        self.requests: dict[SoundKey, None] = {}
+
+    def play(self, key: SoundKey):
+        self.requests[key] = None
+
+    def flush(self):
+        if not self.requests:
+            return
+        for key in self.requests:
+            voices = self.voices[key]
+            channel = next(
+                (voice for voice in voices if not self.backend.is_busy(voice)), None
+            )
+            if channel is None:
+                # Every voice is busy, restart the oldest one
+                channel = voices[self.next_voice[key]]
+                self.next_voice[key] = (self.next_voice[key] + 1) % len(voices)
+            self.backend.play(key, channel)
+        self.requests.clear()
@@ -1,65 +1,140 @@
 import pygame
-from config import Config, ConfigKey
+from bisect import bisect_right
+from typing import Iterator
+from sprite_manager import SpriteManager, SpriteKey
+from config import Config, default_config
 
 
 class Barrier(pygame.sprite.Sprite):
     def __init__(
         self,
-        sprites: list[pygame.Surface],
-        damaged_sprite: pygame.Surface,
+        sprite_manager: SpriteManager,
         position: tuple[(int, int)] = (0, 0),
+        config: Config | None = None,
     ):
         pygame.sprite.Sprite.__init__(self)
-        config = Config()
-        barrier_config = config.barrier_config()
+        if config is None:
+            config = default_config()
+        barrier_config = config.barrier
 
-        self.size = (
-            barrier_config[ConfigKey.BARRIER_WIDTH],
-            barrier_config[ConfigKey.BARRIER_HEIGHT],
-        )
-        self.sprites = [pygame.transform.scale(sprite, self.size) for sprite in sprites]
+        self.size = (barrier_config.width, barrier_config.height)
+        scaled = sprite_manager.get_scaled(SpriteKey.BARRIER, self.size)
+        # Shared undamaged state, never drawn on
+        self.pristine_sprites = scaled.surfaces
+        self.pristine_masks = scaled.masks
+        # Own copies since they get damaged, without RLE as they are redrawn
+        self.sprites = [sprite.copy() for sprite in scaled.surfaces]
+        for sprite in self.sprites:
+            sprite.set_colorkey(sprite.get_colorkey())
         # Manually set the color key to (0,0,0) due to (0,0) of this sprite not being black
-        self.damaged_sprite = damaged_sprite.copy()
-        self.damaged_sprite.set_colorkey((0, 0, 0))
-        self.damaged_sprite = pygame.transform.scale(
-            self.damaged_sprite,
-            (
-                barrier_config[ConfigKey.BARRIER_DAMAGED_WIDTH],
-                barrier_config[ConfigKey.BARRIER_DAMAGED_HEIGHT],
-            ),
+        damaged = sprite_manager.get_scaled(
+            SpriteKey.BARRIER_DAMAGED,
+            (barrier_config.damaged_width, barrier_config.damaged_height),
+            colorkey=(0, 0, 0),
         )
+        self.damaged_sprite = damaged.surfaces[0]
+        self.damaged_mask = damaged.masks[0]
         self.curr_sprite_index = 0
         self.rect = self.sprites[self.curr_sprite_index].get_rect()
         self.rect.x = position[0]
         self.rect.y = position[1]
-        self.mask = pygame.mask.from_surface(self.sprites[self.curr_sprite_index])
+        # The mask is the authoritative damage state, the sprite is redrawn
+        # from it lazily and only where it changed
+        self.mask = self.pristine_masks[self.curr_sprite_index].copy()
+        self.dirty_rect: pygame.Rect | None = None
+        # Bumped on every mask change so readers can cache what they derive from it
+        self.revision = 0
 
     def handle_damage(self, collide_point: tuple[int, int]):
-        sprite = self.sprites[self.curr_sprite_index]
         x = collide_point[0] - self.damaged_sprite.get_width() // 2
         y = collide_point[1] - self.damaged_sprite.get_width() // 2
-        # Draw the damage
-        sprite.blit(self.damaged_sprite, (x, y), special_flags=pygame.BLEND_RGBA_SUB)
-        # Update the mask to new damaged state
-        self.mask = pygame.mask.from_surface(sprite)
+        self.mask.erase(self.damaged_mask, (x, y))
+        self.revision += 1
+        self.mark_dirty(pygame.Rect((x, y), self.damaged_mask.get_size()))
+
+    def reset(self):
+        self.mask.clear()
+        self.mask.draw(self.pristine_masks[self.curr_sprite_index], (0, 0))
+        self.revision += 1
+        self.mark_dirty(self.mask.get_rect())
 
-    def render(self, surface: pygame.Surface):
+    def set_mask(self, mask: pygame.mask.Mask):
+        """Replace the damage state wholesale, e.g. when loading a snapshot."""
+        self.mask = mask
+        self.revision += 1
+        self.mark_dirty(self.mask.get_rect())
+
+    def mark_dirty(self, area: pygame.Rect):
+        area = area.clip(self.mask.get_rect())
+        if self.dirty_rect is None:
+            self.dirty_rect = area
+        else:
+            self.dirty_rect.union_ip(area)
+
+    def refresh_sprite(self) -> pygame.Rect:
+        """Redraw the dirty region of the sprite from the mask."""
+        area = self.dirty_rect
+        self.dirty_rect = None
+        if area.width == 0 or area.height == 0:
+            return area
+        sprite = self.sprites[self.curr_sprite_index]
+        pristine = self.pristine_sprites[self.curr_sprite_index]
+        region = pygame.Mask(area.size)
+        region.draw(self.mask, (-area.x, -area.y))
+        region.to_surface(
+            sprite,
+            setsurface=pristine.subsurface(area),
+            unsetcolor=sprite.get_colorkey(),
+            dest=area.topleft,
+        )
+        return area
+
+    def render(self, surface: pygame.Surface) -> pygame.Rect | None:
+        """Draw the barrier, returns the on-screen area redrawn since last time."""
+        damaged_rect = None
+        if self.dirty_rect is not None:
+            damaged_rect = self.refresh_sprite().move(self.rect.topleft)
         surface.blit(
             self.sprites[self.curr_sprite_index],
             self.rect,
         )
+        return damaged_rect
+
+
+class BarrierBand:
+    """
+    Broad phase for bullet-vs-barrier checks.
+
+    Barriers sit in one horizontal band, so bullets outside its vertical span
+    are rejected outright and the rest only test the barriers whose x-interval
+    they overlap, found by bisecting the sorted left edges.
+    """
 
-        # DEBUG
-        # Damaged sprite
-        # surface.blit(
-        #     pygame.mask.from_surface(self.damaged_sprite).to_surface(
+    def __init__(self, barriers: list[Barrier]) -> None:
+        self.barriers = sorted(barriers, key=lambda barrier: barrier.rect.left)
+        self.lefts = [barrier.rect.left for barrier in self.barriers]
+        self.top = min((barrier.rect.top for barrier in barriers), default=0)
+        self.bottom = max((barrier.rect.bottom for barrier in barriers), default=0)
 
-        #     ),
-        #     (200, 50),
-        # )
+    def candidates(self, rect: pygame.Rect) -> Iterator[Barrier]:
+        if rect.bottom <= self.top or rect.top >= self.bottom:
+            return
+        index = bisect_right(self.lefts, rect.right - 1) - 1
+        first = index
+        # Barriers never overlap, so walk left only while they still reach rect
+        while first > 0 and self.barriers[first - 1].rect.right > rect.left:
+            first -= 1
+        for barrier in self.barriers[first : index + 1]:
+            if barrier.rect.right > rect.left:
+                yield barrier
 
-        # Mask
-        # surface.blit(
-        #     self.mask.to_surface(setcolor=(255, 0, 0, 255)),
-        #     self.rect,
-        # )
+    def overlaps(
+        self, rect: pygame.Rect, mask: pygame.mask.Mask
+    ) -> Iterator[tuple[Barrier, tuple[int, int]]]:
+        """Barriers whose mask overlaps the given one, with the collide point."""
+        for barrier in self.candidates(rect):
+            collide_point = barrier.mask.overlap(
+                mask, (rect.x - barrier.rect.x, rect.y - barrier.rect.y)
+            )
+            if collide_point is not None:
+                yield barrier, collide_point
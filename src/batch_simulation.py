@@ -0,0 +1,467 @@
+import numpy as np
+import pygame
+from bullet import BulletSource
+from sprite_manager import SpriteManager
+from simulation import Simulation
+from config import Config, default_config
+
+
+def to_pixels(values: np.ndarray) -> np.ndarray:
+    """Round to whole pixels half away from zero, as assigning to pygame.Rect does."""
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int64)
+
+
+def mask_to_array(mask: pygame.mask.Mask) -> np.ndarray:
+    width, height = mask.get_size()
+    return np.array(
+        [[mask.get_at((x, y)) for x in range(width)] for y in range(height)],
+        dtype=bool,
+    )
+
+
+class BatchSimulation:
+    """
+    Runs many independent games in lockstep as NumPy arrays.
+
+    The rules mirror Simulation (formation stepping, enemy firing, bullet
+    movement, culling and collisions), the layout is taken from a template
+    Simulation so both engines agree on sizes and positions.
+    Enemy cells are indexed [game, col, row] with row 0 at the bottom,
+    the same order as EnemyFormation.enemies.
+    """
+
+    def __init__(
+        self,
+        num_games: int,
+        sprite_manager: SpriteManager,
+        config: Config | None = None,
+        seed: int | None = None,
+    ) -> None:
+        if config is None:
+            config = default_config()
+        template = Simulation(sprite_manager=sprite_manager, config=config)
+        gameplay_config = config.gameplay
+
+        self.num_games = num_games
+        self.rng = np.random.default_rng(seed)
+        self.width = template.width
+        self.height = template.height
+
+        # Player
+        player = template.player
+        self.player_start_x = player.rect.x
+        self.player_y = player.rect.y
+        self.player_size = player.rect.size
+        self.player_speed = player.speed
+        self.player_lives = player.lives
+        self.death_timer_ms = player.death_timer_ms
+        self.player_left_limit = template.playable_area_offset
+        self.player_right_limit = (
+            self.width - template.playable_area_offset - player.size[0]
+        )
+
+        # Formation
+        formation = template.enemy_formation
+        self.enemy_col = formation.enemy_col
+        self.enemy_row = formation.enemy_row
+        self.enemy_size = formation.enemy_size
+        self.cell_step = (
+            formation.enemy_size[0] + formation.enemy_formation_gap,
+            formation.enemy_size[1] + formation.enemy_formation_gap,
+        )
+        self.enemy_start_pos = formation.origin()
+        self.enemy_speed = formation.enemy_speed
+        self.left_limit = formation.left_limit
+        self.right_limit = formation.right_limit
+        self.move_down_distance = formation.move_down_distance
+        self.step_interval = formation.step_interval
+        self.respawn_timer_ms = formation.respawn_timer
+        self.max_bullets = formation.max_bullets
+        self.min_firing_cooldown = formation.min_firing_cooldown
+        self.max_firing_cooldown = formation.max_firing_cooldown
+        self.row_points = np.array(
+            [formation.point_at(0, row) for row in range(self.enemy_row)],
+            dtype=np.int64,
+        )
+        self.col_offsets = np.arange(self.enemy_col) * self.cell_step[0]
+        self.row_offsets = np.arange(self.enemy_row) * self.cell_step[1]
+
+        # Bullets
+        self.player_bullet_speed = gameplay_config.player_bullet_speed
+        self.enemy_bullet_speed = gameplay_config.enemy_bullet_speed
+        player_bullets = template.player.bullets
+        enemy_bullets = formation.bullets
+        self.bullet_size = player_bullets.size
+        self.player_bullet_mask = mask_to_array(
+            player_bullets.masks[BulletSource.PLAYER.value]
+        )
+        self.enemy_bullet_mask = mask_to_array(
+            enemy_bullets.masks[BulletSource.ENEMY.value]
+        )
+
+        # Barriers, all share the same pristine bitmap and crater
+        barriers = template.barriers
+        self.barrier_x = np.array([barrier.rect.x for barrier in barriers])
+        self.barrier_y = barriers[0].rect.y
+        self.barrier_size = barriers[0].rect.size
+        self.barrier_pristine = mask_to_array(barriers[0].mask)
+        self.crater = mask_to_array(barriers[0].damaged_mask)
+        self.crater_offset = barriers[0].damaged_sprite.get_width() // 2
+
+        n = num_games
+        self.alive = np.zeros((n, self.enemy_col, self.enemy_row), dtype=bool)
+        self.origin = np.zeros((n, 2))
+        self.direction = np.zeros(n, dtype=np.int64)
+        self.current_step = np.zeros(n)
+        self.can_move_down = np.zeros(n, dtype=bool)
+        self.can_move = np.zeros(n, dtype=bool)
+        self.wave_count = np.zeros(n, dtype=np.int64)
+        self.enemy_count = np.zeros(n, dtype=np.int64)
+        self.firing_cooldown = np.zeros(n)
+
+        self.player_x = np.zeros(n)
+        self.lives = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.player_dead = np.zeros(n, dtype=bool)
+        self.is_game_over = np.zeros(n, dtype=bool)
+        self.revive_timer = np.zeros(n)
+        self.respawn_timer = np.zeros(n)
+
+        self.player_bullet_active = np.zeros(n, dtype=bool)
+        self.player_bullet_pos = np.zeros((n, 2))
+        self.enemy_bullet_active = np.zeros((n, self.max_bullets), dtype=bool)
+        self.enemy_bullet_pos = np.zeros((n, self.max_bullets, 2))
+
+        self.barriers = np.zeros(
+            (n, len(barriers)) + self.barrier_pristine.shape, dtype=bool
+        )
+        self.tick = 0
+        self.reset()
+
+    def reset(self, games: np.ndarray | None = None):
+        """Restart the selected games (all when None), e.g. after game over."""
+        if games is None:
+            games = np.ones(self.num_games, dtype=bool)
+        count = int(np.count_nonzero(games))
+        if count == 0:
+            return
+
+        self.alive[games] = True
+        self.origin[games] = self.enemy_start_pos
+        self.direction[games] = 1
+        self.current_step[games] = self.step_interval
+        self.can_move_down[games] = False
+        self.can_move[games] = True
+        self.wave_count[games] = 0
+        self.enemy_count[games] = self.enemy_col * self.enemy_row
+        self.firing_cooldown[games] = self.rng.uniform(
+            self.min_firing_cooldown, self.max_firing_cooldown, count
+        )
+
+        self.player_x[games] = self.player_start_x
+        self.lives[games] = self.player_lives
+        self.score[games] = 0
+        self.player_dead[games] = False
+        self.is_game_over[games] = False
+        self.revive_timer[games] = np.inf
+        self.respawn_timer[games] = np.inf
+
+        self.player_bullet_active[games] = False
+        self.enemy_bullet_active[games] = False
+        self.barriers[games] = self.barrier_pristine
+
+    def step(
+        self,
+        delta_time: float,
+        left: np.ndarray,
+        right: np.ndarray,
+        fire: np.ndarray,
+    ):
+        """Advance every game by one tick, inputs are boolean arrays of size N."""
+        self.tick += 1
+        self.update_timers(delta_time)
+
+        running = ~self.is_game_over
+        self.player_shoot(fire & running)
+        active = running & ~self.player_dead
+
+        self.update_player_bullets(delta_time, active)
+        self.update_enemy_bullets(delta_time, active)
+        self.update_player(delta_time, active & left, active & right)
+        self.move_by_step(delta_time, active & self.can_move)
+        self.auto_shoot(delta_time, active)
+        self.update_player_collisions(active)
+
+    def update_timers(self, delta_time: float):
+        elapsed = delta_time * 1000
+        self.revive_timer -= elapsed
+        self.respawn_timer -= elapsed
+
+        revive = self.revive_timer <= 0
+        self.player_dead[revive] = False
+        self.revive_timer[revive] = np.inf
+
+        respawn = self.respawn_timer <= 0
+        if respawn.any():
+            self.respawn_timer[respawn] = np.inf
+            self.alive[respawn] = True
+            self.origin[respawn] = self.enemy_start_pos
+            self.direction[respawn] = 1
+            self.can_move_down[respawn] = False
+            self.wave_count[respawn] += 1
+            self.enemy_count[respawn] = self.enemy_col * self.enemy_row
+            self.can_move[respawn] = True
+
+    def player_shoot(self, fire: np.ndarray):
+        # One bullet at a time
+        shoot = fire & ~self.player_bullet_active
+        self.player_bullet_active |= shoot
+        self.player_bullet_pos[shoot, 0] = (
+            self.player_x[shoot] + self.player_size[0] / 2
+        )
+        self.player_bullet_pos[shoot, 1] = self.player_y
+
+    def update_player_bullets(self, delta_time: float, active: np.ndarray):
+        moving = active & self.player_bullet_active
+        pos = self.player_bullet_pos
+        # Positions stay exact, collisions round them like BulletPool.rect_at
+        pos[moving, 1] -= delta_time * self.player_bullet_speed
+
+        # Out of bound
+        out = moving & ((pos[:, 1] < 0) | (pos[:, 1] > self.height))
+        self.player_bullet_active[out] = False
+        moving &= ~out
+
+        # Enemy collision, first hit in column order then bottom-up
+        candidates = self.alive & self.enemy_overlap(
+            to_pixels(pos[:, 0]), to_pixels(pos[:, 1]), self.bullet_size
+        )
+        candidates = candidates.reshape(self.num_games, -1)
+        hit = moving & candidates.any(axis=1)
+        if hit.any():
+            games = np.flatnonzero(hit)
+            cells = candidates[games].argmax(axis=1)
+            cols, rows = np.divmod(cells, self.enemy_row)
+            self.alive[games, cols, rows] = False
+            self.score[games] += self.row_points[rows]
+            self.enemy_count[games] -= 1
+            self.player_bullet_active[games] = False
+
+            cleared = games[self.enemy_count[games] == 0]
+            self.enemy_bullet_active[cleared] = False
+            self.can_move[cleared] = False
+            self.respawn_timer[cleared] = self.respawn_timer_ms
+
+        # Barrier collision
+        games = np.flatnonzero(moving)
+        barrier_hit = self.hit_barriers(
+            games, pos[games, 0], pos[games, 1], self.player_bullet_mask
+        )
+        self.player_bullet_active[games[barrier_hit]] = False
+
+    def update_enemy_bullets(self, delta_time: float, active: np.ndarray):
+        moving = active[:, None] & self.enemy_bullet_active
+        pos = self.enemy_bullet_pos
+        pos[moving, 1] += delta_time * self.enemy_bullet_speed
+
+        # Out of bound
+        out = moving & ((pos[..., 1] < 0) | (pos[..., 1] > self.height))
+        self.enemy_bullet_active[out] = False
+        moving &= ~out
+
+        # Player collision, every bullet that hits costs a life
+        player_x = to_pixels(self.player_x)[:, None]
+        bullet_x, bullet_y = to_pixels(pos[..., 0]), to_pixels(pos[..., 1])
+        hit_player = (
+            moving
+            & (bullet_x < player_x + self.player_size[0])
+            & (player_x < bullet_x + self.bullet_size[0])
+            & (bullet_y < self.player_y + self.player_size[1])
+            & (self.player_y < bullet_y + self.bullet_size[1])
+        )
+        hits = hit_player.sum(axis=1)
+        self.enemy_bullet_active[hit_player] = False
+        self.handle_player_hit(hits, revive=True)
+
+        # Barrier collision
+        games, slots = np.nonzero(moving)
+        barrier_hit = self.hit_barriers(
+            games, pos[games, slots, 0], pos[games, slots, 1], self.enemy_bullet_mask
+        )
+        self.enemy_bullet_active[games[barrier_hit], slots[barrier_hit]] = False
+
+    def update_player(self, delta_time: float, left: np.ndarray, right: np.ndarray):
+        distance = self.player_speed * delta_time
+        self.player_x[left] = np.maximum(
+            self.player_x[left] - distance, self.player_left_limit
+        )
+        self.player_x[right] = np.minimum(
+            self.player_x[right] + distance, self.player_right_limit
+        )
+
+    def move_by_step(self, delta_time: float, moving: np.ndarray):
+        waiting = moving & (self.current_step > 0)
+        self.current_step[waiting] -= (
+            delta_time + self.wave_count[waiting] * self.enemy_speed
+        )
+
+        stepping = moving & ~waiting
+        if not stepping.any():
+            return
+
+        # Horizontal extents of the live columns
+        live_cols = self.alive.any(axis=2)
+        has_live = live_cols.any(axis=1)
+        left_col = live_cols.argmax(axis=1)
+        right_col = self.enemy_col - 1 - live_cols[:, ::-1].argmax(axis=1)
+        curr_left = self.origin[:, 0] + self.col_offsets[left_col]
+        curr_right = self.origin[:, 0] + self.col_offsets[right_col]
+        past_bound = has_live & (
+            (curr_left <= self.left_limit) | (curr_right >= self.right_limit)
+        )
+
+        down = stepping & past_bound & self.can_move_down
+        across = stepping & ~down
+        self.direction[down] *= -1
+        self.origin[down, 1] += self.move_down_distance
+        self.can_move_down[down] = False
+        self.origin[across, 0] += self.enemy_size[0] * self.direction[across]
+        self.can_move_down[across] = True
+        self.current_step[stepping] = self.step_interval
+
+    def auto_shoot(self, delta_time: float, active: np.ndarray):
+        ready = (
+            active
+            & (self.enemy_bullet_active.sum(axis=1) < self.max_bullets)
+            & (self.firing_cooldown < 0)
+        )
+        if ready.any():
+            # Each column with a live enemy flips a coin, the first heads shoots
+            games = np.flatnonzero(ready)
+            live_cols = self.alive[games].any(axis=2)
+            coins = self.rng.integers(0, 2, live_cols.shape).astype(bool)
+            shooters = live_cols & coins
+            shooting = shooters.any(axis=1)
+            games = games[shooting]
+            cols = shooters[shooting].argmax(axis=1)
+            rows = self.alive[games, cols].argmax(axis=1)
+            slots = self.enemy_bullet_active[games].argmin(axis=1)
+
+            self.enemy_bullet_active[games, slots] = True
+            self.enemy_bullet_pos[games, slots, 0] = (
+                self.origin[games, 0]
+                + self.col_offsets[cols]
+                + self.enemy_size[0] / 2
+            )
+            self.enemy_bullet_pos[games, slots, 1] = (
+                self.origin[games, 1] - self.row_offsets[rows]
+            )
+            self.firing_cooldown[games] = self.rng.uniform(
+                self.min_firing_cooldown, self.max_firing_cooldown, len(games)
+            )
+
+        self.firing_cooldown[active] -= delta_time
+
+    def update_player_collisions(self, active: np.ndarray):
+        player_x = to_pixels(self.player_x)
+        collide = self.alive & self.enemy_overlap(
+            player_x, np.full(self.num_games, self.player_y), self.player_size
+        )
+        hits = (active & collide.any(axis=(1, 2))).astype(np.int64)
+        self.handle_player_hit(hits, revive=False)
+
+    def handle_player_hit(self, hits: np.ndarray, revive: bool):
+        hit = hits > 0
+        if not hit.any():
+            return
+        self.lives -= hits
+        self.player_dead |= hit
+        game_over = hit & (self.lives <= 0)
+        self.is_game_over |= game_over
+        if revive:
+            self.revive_timer[hit & ~game_over] = self.death_timer_ms
+
+    def enemy_overlap(
+        self, x: np.ndarray, y: np.ndarray, size: tuple[int, int]
+    ) -> np.ndarray:
+        """Cells of each game's lattice whose rect overlaps the given rects."""
+        enemy_x = self.origin[:, :1] + self.col_offsets
+        enemy_y = self.origin[:, 1:] - self.row_offsets
+        cols = (enemy_x < x[:, None] + size[0]) & (
+            x[:, None] < enemy_x + self.enemy_size[0]
+        )
+        rows = (enemy_y < y[:, None] + size[1]) & (
+            y[:, None] < enemy_y + self.enemy_size[1]
+        )
+        return cols[:, :, None] & rows[:, None, :]
+
+    def hit_barriers(
+        self, games: np.ndarray, x: np.ndarray, y: np.ndarray, bullet_mask: np.ndarray
+    ) -> np.ndarray:
+        """Pixel test bullets against barrier bitmaps and apply craters."""
+        hit = np.zeros(len(games), dtype=bool)
+        if len(games) == 0:
+            return hit
+
+        barrier_height, barrier_width = self.barrier_pristine.shape
+        bullet_height, bullet_width = bullet_mask.shape
+        x = to_pixels(x)
+        y = to_pixels(y)
+
+        # Barriers never overlap horizontally, so each bullet has one candidate
+        barrier = np.searchsorted(self.barrier_x, x + bullet_width, side="left") - 1
+        offset_x = x - self.barrier_x[np.maximum(barrier, 0)]
+        offset_y = y - self.barrier_y
+        near = (
+            (barrier >= 0)
+            & (offset_x < barrier_width)
+            & (offset_y < barrier_height)
+            & (offset_y + bullet_height > 0)
+        )
+        if not near.any():
+            return hit
+
+        index = np.flatnonzero(near)
+        games, barrier = games[index], barrier[index]
+        offset_x, offset_y = offset_x[index], offset_y[index]
+        rows = offset_y[:, None] + np.arange(bullet_height)
+        cols = offset_x[:, None] + np.arange(bullet_width)
+        inside = (
+            ((rows >= 0) & (rows < barrier_height))[:, :, None]
+            & ((cols >= 0) & (cols < barrier_width))[:, None, :]
+            & bullet_mask
+        )
+        pixels = self.barriers[
+            games[:, None, None],
+            barrier[:, None, None],
+            np.clip(rows, 0, barrier_height - 1)[:, :, None],
+            np.clip(cols, 0, barrier_width - 1)[:, None, :],
+        ]
+        overlap = (pixels & inside).reshape(len(index), -1)
+        collided = overlap.any(axis=1)
+        if not collided.any():
+            return hit
+
+        # Erase the crater centered on the first overlapping pixel
+        first = overlap[collided].argmax(axis=1)
+        point_y, point_x = np.divmod(first, bullet_width)
+        crater_x = offset_x[collided] + point_x - self.crater_offset
+        crater_y = offset_y[collided] + point_y - self.crater_offset
+        crater_height, crater_width = self.crater.shape
+        crater_rows = crater_y[:, None] + np.arange(crater_height)
+        crater_cols = crater_x[:, None] + np.arange(crater_width)
+        erase = (
+            ((crater_rows >= 0) & (crater_rows < barrier_height))[:, :, None]
+            & ((crater_cols >= 0) & (crater_cols < barrier_width))[:, None, :]
+            & self.crater
+        )
+        hit_index, erase_row, erase_col = np.nonzero(erase)
+        self.barriers[
+            games[collided][hit_index],
+            barrier[collided][hit_index],
+            crater_rows[hit_index, erase_row],
+            crater_cols[hit_index, erase_col],
+        ] = False
+
+        hit[index[collided]] = True
+        return hit
@@ -0,0 +1,249 @@
+import os
+
+# Must be set before pygame initialises its drivers
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pygame
+from dataclasses import dataclass, field
+from typing import Callable
+from config import load_config
+from main import Game, GameScene
+from replay import InputFlag
+
+FRAME_DELTA = 1 / 60
+
+
+@dataclass
+class Scenario:
+    name: str
+    overrides: dict = field(default_factory=dict)
+    profile: str | None = None
+    # Frame index -> input flags for that frame
+    inputs: Callable[[int], InputFlag] = lambda frame: InputFlag(0)
+    # Called with the game before every frame, for state a player could not produce
+    before_frame: Callable[[Game, int], None] | None = None
+
+
+def sweep_and_fire(frame: int) -> InputFlag:
+    # About three seconds each way takes the player across the whole screen
+    direction = InputFlag.LEFT if frame % 360 < 180 else InputFlag.RIGHT
+    return direction | InputFlag.FIRE
+
+
+def clear_wave(game: Game, frame: int):
+    simulation = game.simulation
+    if frame % 30 != 0 or not simulation.enemy_formation.can_move:
+        return
+    for col, row in np.argwhere(simulation.enemy_formation.alive).tolist():
+        simulation.kill_enemy(col, row)
+
+
+# Lives are raised so the game never ends part way through a run
+UNDYING = {"player.lives": 1_000_000}
+
+SCENARIOS = [
+    Scenario("formation-idle", overrides=UNDYING),
+    Scenario(
+        "max-enemy-bullets",
+        overrides={
+            **UNDYING,
+            "enemy_formation.max_bullets": 200,
+            "enemy_formation.min_firing_cooldown": 0,
+            "enemy_formation.max_firing_cooldown": 0,
+        },
+    ),
+    Scenario(
+        "barrier-bombardment",
+        overrides={
+            **UNDYING,
+            "enemy_formation.max_bullets": 40,
+            "enemy_formation.min_firing_cooldown": 0,
+            "enemy_formation.max_firing_cooldown": 0.05,
+            # A faster march spreads the fire over every barrier
+            "enemy_formation.step_interval": 0.1,
+        },
+        inputs=sweep_and_fire,
+    ),
+    Scenario(
+        "wave-churn",
+        overrides={**UNDYING, "enemy_formation.respawn_timer_ms": 100},
+        inputs=sweep_and_fire,
+        before_frame=clear_wave,
+    ),
+    Scenario(
+        "large-formation",
+        overrides={
+            **UNDYING,
+            "enemy_formation.cols": 40,
+            "enemy_formation.rows": 20,
+            "enemy_formation.enemy_width": 10,
+            "enemy_formation.enemy_height": 6,
+            "enemy_formation.gap": 4,
+        },
+        inputs=sweep_and_fire,
+    ),
+    Scenario("swarm", overrides=UNDYING, profile="stress", inputs=sweep_and_fire),
+]
+
+
+def build_game(scenario: Scenario, seed: int) -> Game:
+    game = Game(
+        load_config(profile=scenario.profile, overrides=scenario.overrides), seed=seed
+    )
+    game.finish_loading(wait=True)
+    game.current_scene = GameScene.PLAYING
+    # Uncapped, with a fixed step so every run simulates the same frames
+    game.FPS = 0
+    game.read_input_flags = lambda: scenario.inputs(game.simulation.tick)
+    return game
+
+
+def run_frames(game: Game, scenario: Scenario, frames: int):
+    for frame in range(frames):
+        if game.profiler is not None:
+            game.profiler.begin_frame()
+        if scenario.before_frame is not None:
+            scenario.before_frame(game, frame)
+        game.handle_events()
+        game.update()
+        game.render()
+        game.delta_time = FRAME_DELTA
+
+
+def run_scenario(scenario: Scenario, frames: int, seed: int, memory: bool) -> dict:
+    game = build_game(scenario, seed)
+    # One spare slot so no frame of the run is overwritten
+    game.toggle_profiler(capacity=frames + 1)
+    profiler = game.profiler
+    start = time.perf_counter()
+    run_frames(game, scenario, frames)
+    profiler.begin_frame()
+    elapsed = time.perf_counter() - start
+    ticks = game.simulation.tick
+
+    rows = list(profiler.timings[:, :frames]) + [profiler.frame_times[:frames]]
+    phases = {
+        label: {
+            "mean_ms": float(np.mean(row) * 1000),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        }
+        for (label, p50, p95, p99), row in zip(profiler.percentiles(), rows)
+    }
+    result = {
+        "frames": frames,
+        "ticks": ticks,
+        "seconds": elapsed,
+        "frames_per_second": frames / elapsed,
+        "ticks_per_second": ticks / elapsed,
+        "score": game.simulation.player.score,
+        "frame_stats": game.frame_stats(),
+        "phases": phases,
+    }
+
+    if memory:
+        # Separate pass, tracemalloc slows everything down too much to time with it
+        game = build_game(scenario, seed)
+        tracemalloc.start()
+        run_frames(game, scenario, frames)
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressions of results against baseline beyond the relative threshold."""
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        speed = result["ticks_per_second"] / base["ticks_per_second"] - 1
+        if speed < -threshold:
+            regressions.append(f"{name}: ticks/s {speed:+.1%}")
+        if "peak_memory_bytes" in result and "peak_memory_bytes" in base:
+            growth = result["peak_memory_bytes"] / base["peak_memory_bytes"] - 1
+            if growth > threshold:
+                regressions.append(f"{name}: peak memory {growth:+.1%}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Headless benchmark scenarios")
+    parser.add_argument("--output", default="benchmark.json", help="Results file")
+    parser.add_argument("--baseline", help="Earlier results file to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative slowdown or memory growth counted as a regression",
+    )
+    parser.add_argument("--frames", type=int, default=1200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[scenario.name for scenario in SCENARIOS],
+        help="Run only these scenarios, may be repeated",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="Skip the memory pass")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "frames": args.frames,
+            "seed": args.seed,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": {},
+    }
+    for scenario in SCENARIOS:
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        result = run_scenario(scenario, args.frames, args.seed, not args.no_memory)
+        results["scenarios"][scenario.name] = result
+        phases = result["phases"]
+        slowest = max(
+            (label for label in phases if label != "frame"),
+            key=lambda label: phases[label]["mean_ms"],
+        )
+        print(
+            f"{scenario.name:<22}{result['ticks_per_second']:9.0f} ticks/s"
+            f"  frame p99 {phases['frame']['p99_ms']:6.2f} ms"
+            f"  slowest {slowest} {phases[slowest]['mean_ms']:.3f} ms"
+            + (
+                f"  peak {result['peak_memory_bytes'] / 2**20:.1f} MiB"
+                if "peak_memory_bytes" in result
+                else ""
+            )
+        )
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,40 +1,127 @@
+import numpy as np
 import pygame
-from config import Config, ConfigKey
+from sprite_manager import SpriteManager, SpriteKey
+from config import Config, default_config
 from enum import Enum
 
 BulletSource = Enum("BulletSource", [("PLAYER", 1), ("ENEMY", 2)])
 
 
-class Bullet(pygame.sprite.Sprite):
+class BulletPool:
+    """
+    Preallocated bullet store.
+
+    Positions, velocities and sources live in contiguous arrays, every bullet
+    of a type shares one scaled sprite and mask, and freed slots are reused
+    so firing allocates nothing.
+    """
+
     def __init__(
         self,
-        sprites: list[pygame.Surface],
-        position: pygame.Vector2,
-        speed: float,
+        capacity: int,
+        sprite_manager: SpriteManager,
+        sprite_keys: dict[BulletSource, SpriteKey],
         size: tuple[int, int] | None = None,
-        source: BulletSource = BulletSource.PLAYER.value,
+        config: Config | None = None,
     ):
-        pygame.sprite.Sprite.__init__(self)
-        config = Config()
-        gameplay_config = config.gameplay_config()
-        
-        self.position = position
-        self.size = size if size is not None else (gameplay_config[ConfigKey.BULLET_WIDTH], gameplay_config[ConfigKey.BULLET_HEIGHT]) 
-        self.speed = speed
-        self.source = source
-
-        self.sprites = [pygame.transform.scale(sprite, self.size) for sprite in sprites]
-        self.curr_sprite_index = 0
-        self.rect = self.sprites[self.curr_sprite_index].get_rect()
-        self.mask = pygame.mask.from_surface(self.sprites[self.curr_sprite_index])
-        self.rect.x = position.x
-        self.rect.y = position.y
-
-    def is_out_of_bound(self, upper_bound: float, lower_bound: float):
-        return self.rect.y < upper_bound or self.rect.y > lower_bound
-
-    def move_vertically(self, distance):
-        self.rect.y += distance
-
-    def render(self, surface):
-        surface.blit(self.sprites[self.curr_sprite_index], self.rect)
+        if config is None:
+            config = default_config()
+        gameplay_config = config.gameplay
+
+        self.capacity = capacity
+        self.size = (
+            size
+            if size is not None
+            else (gameplay_config.bullet_width, gameplay_config.bullet_height)
+        )
+        self.sprites: dict[int, pygame.Surface] = {}
+        self.masks: dict[int, pygame.mask.Mask] = {}
+        for source, sprite_key in sprite_keys.items():
+            scaled = sprite_manager.get_scaled(sprite_key, self.size)
+            self.sprites[source.value] = scaled.surfaces[0]
+            self.masks[source.value] = scaled.masks[0]
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        # Positions at the start of the tick, rendering interpolates from them
+        self.previous_y = np.zeros(capacity)
+        self.velocity = np.zeros(capacity)
+        self.source = np.zeros(capacity, dtype=np.int8)
+        self.active = np.zeros(capacity, dtype=bool)
+        # Highest index on top so slots fill from the front
+        self.free: list[int] = list(range(capacity - 1, -1, -1))
+        self.count = 0
+
+        # Scratch rect handed out by rect_at, only valid until the next call
+        self.rect = pygame.Rect((0, 0), self.size)
+
+    def __len__(self):
+        return self.count
+
+    def spawn(
+        self, position: pygame.Vector2, velocity: float, source: BulletSource
+    ) -> int | None:
+        if not self.free:
+            return None
+        index = self.free.pop()
+        self.x[index] = position.x
+        self.y[index] = position.y
+        self.previous_y[index] = position.y
+        self.velocity[index] = velocity
+        self.source[index] = source.value
+        self.active[index] = True
+        self.count += 1
+        return index
+
+    def despawn(self, index: int):
+        if not self.active[index]:
+            return
+        self.active[index] = False
+        self.free.append(index)
+        self.count -= 1
+
+    def clear(self):
+        # Zeroed like a new pool, so a reset game observes and snapshots the same
+        for values in (self.x, self.y, self.previous_y, self.velocity, self.source):
+            values[:] = 0
+        self.active[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+        self.count = 0
+
+    def indices(self) -> list[int]:
+        if self.count == 0:
+            return []
+        return np.flatnonzero(self.active).tolist()
+
+    def store_previous(self):
+        if self.count == 0:
+            return
+        np.copyto(self.previous_y, self.y)
+
+    def move(self, delta_time: float):
+        if self.count == 0:
+            return
+        self.y += self.velocity * delta_time * self.active
+
+    def cull(self, upper_bound: float, lower_bound: float):
+        if self.count == 0:
+            return
+        out = self.active & ((self.y < upper_bound) | (self.y > lower_bound))
+        for index in np.flatnonzero(out).tolist():
+            self.despawn(index)
+
+    def rect_at(self, index: int) -> pygame.Rect:
+        self.rect.x = self.x[index]
+        self.rect.y = self.y[index]
+        return self.rect
+
+    def mask_at(self, index: int) -> pygame.mask.Mask:
+        return self.masks[self.source[index]]
+
+    def render(self, surface: pygame.Surface, alpha: float = 1.0):
+        if self.count == 0:
+            return
+        previous = self.previous_y
+        y = previous + (self.y - previous) * alpha
+        for index in self.indices():
+            surface.blit(self.sprites[self.source[index]], (self.x[index], y[index]))
@@ -0,0 +1,157 @@
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+import pygame
+from typing import Iterator, Literal
+
+MAGIC = b"SIFC"
+VERSION = 1
+# magic, version, width, height
+HEADER = struct.Struct("<4sHII")
+# frame number, compressed size
+FRAME = struct.Struct("<II")
+
+
+class FrameCapture:
+    """
+    Records every presented frame without stalling the game loop.
+
+    `capture` only copies the surface's pixel memory into one of a fixed set
+    of preallocated buffers and queues it; a worker thread turns it into RGB
+    and compresses it. With "zlib" frames go into one stream file read back
+    by `read_frames`, with "png" into a directory of numbered images.
+
+    When every buffer is still waiting for the encoder the frame is dropped,
+    or with backpressure="block" the game waits up to `max_wait` for one.
+    """
+
+    def __init__(
+        self,
+        surface: pygame.Surface,
+        path: str,
+        format: Literal["zlib", "png"] = "zlib",
+        buffers: int = 8,
+        backpressure: Literal["drop", "block"] = "drop",
+        max_wait: float = 0.05,
+        level: int = 1,
+    ) -> None:
+        if format not in ("zlib", "png"):
+            raise ValueError(f"Unknown capture format {format!r}")
+        if backpressure not in ("drop", "block"):
+            raise ValueError(f"Unknown capture backpressure {backpressure!r}")
+        if surface.get_bytesize() != 4:
+            raise ValueError("Frame capture needs a 32 bit surface")
+        self.surface = surface
+        self.path = path
+        self.format = format
+        self.backpressure = backpressure
+        self.max_wait = max_wait
+        self.level = level
+
+        self.size = surface.get_size()
+        width, height = self.size
+        self.pitch = surface.get_pitch()
+        # Byte offsets of red, green and blue within a little endian pixel
+        self.channels = [shift // 8 for shift in surface.get_shifts()[:3]]
+        self.free: queue.Queue[np.ndarray] = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(np.empty(self.pitch * height, dtype=np.uint8))
+        self.pending: queue.Queue[tuple[int, np.ndarray] | None] = queue.Queue()
+        self.rgb = np.empty((height, width, 3), dtype=np.uint8)
+
+        self.frames = 0
+        self.written = 0
+        self.dropped = 0
+        self.error: BaseException | None = None
+
+        if format == "zlib":
+            self.file = open(path, "wb")
+            self.file.write(HEADER.pack(MAGIC, VERSION, width, height))
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.file = None
+            self.image = pygame.image.frombuffer(self.rgb, self.size, "RGB")
+        self.worker = threading.Thread(target=self.encode, daemon=True)
+        self.worker.start()
+
+    def capture(self):
+        """Queue the surface's current contents as the next frame."""
+        index = self.frames
+        self.frames += 1
+        try:
+            if self.backpressure == "block":
+                buffer = self.free.get(timeout=self.max_wait)
+            else:
+                buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return
+        # One copy of the raw pixels, the surface is locked only while it runs
+        raw = self.surface.get_buffer()
+        np.copyto(buffer, np.frombuffer(raw, dtype=np.uint8))
+        del raw
+        self.pending.put((index, buffer))
+
+    def encode(self):
+        width, height = self.size
+        while (item := self.pending.get()) is not None:
+            index, buffer = item
+            try:
+                if self.error is None:
+                    pixels = buffer.reshape(height, self.pitch)[:, : width * 4]
+                    pixels = pixels.reshape(height, width, 4)
+                    for channel, offset in enumerate(self.channels):
+                        self.rgb[..., channel] = pixels[..., offset]
+                    self.write(index)
+                    self.written += 1
+            except BaseException as error:
+                # Reported on close, the game carries on without the capture
+                self.error = error
+            finally:
+                self.free.put(buffer)
+
+    def write(self, index: int):
+        if self.file is not None:
+            data = zlib.compress(self.rgb, self.level)
+            self.file.write(FRAME.pack(index, len(data)))
+            self.file.write(data)
+        else:
+            pygame.image.save(
+                self.image, os.path.join(self.path, f"frame-{index:06d}.png")
+            )
+
+    @property
+    def backlog(self) -> int:
+        return self.pending.qsize()
+
+    def close(self):
+        """Wait for the queued frames to be written."""
+        self.pending.put(None)
+        self.worker.join()
+        if self.file is not None:
+            self.file.close()
+        if self.error is not None:
+            raise self.error
+
+
+def read_frames(path: str) -> Iterator[tuple[int, np.ndarray]]:
+    """(frame number, (height, width, 3) RGB array) for each frame of a stream."""
+    with open(path, "rb") as file:
+        magic, version, width, height = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a frame capture")
+        if version != VERSION:
+            raise ValueError(f"Unsupported capture version {version}")
+        while header := file.read(FRAME.size):
+            index, size = FRAME.unpack(header)
+            data = zlib.decompress(file.read(size))
+            yield index, np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+
+
+def default_capture_path(format: str) -> str:
+    stamp = int(time.time())
+    return f"./capture-{stamp}" + (".frames" if format == "zlib" else "")
@@ -1,150 +1,207 @@
+import dataclasses
+import json
+import os
+import tomllib
+from dataclasses import dataclass, field
 from enum import Enum
-
-
-class ConfigKey(Enum):
-    # Visual
-    SCREEN_WIDTH = "screen-width"
-    SCREEN_HEIGHT = "screen-height"
-    FPS = "FPS"
-    SCREEN_COLOR = "screen-color"
-    TEXT_COLOR = "text-color"
-    GAME_ICON_PATH = "game-icon-path"
-    GAME_TITLE = "game-title"
-
-    # Font
-    FONT_PATH = "font-path"
-    BASE_FONT_SIZE = "base-font-size"
-    LARGE_FONT_SIZE = "large-font-size"
-
-    # Sprite
-    SPRITESHEET_PATH = "spritesheet-path"
-
-    # Sound
-    ENEMY_MOVE_SOUND_1 = "enemy-move-sound-1"
-    ENEMY_MOVE_SOUND_2 = "enemy-move-sound-2"
-    ENEMY_MOVE_SOUND_3 = "enemy-move-sound-3"
-    ENEMY_MOVE_SOUND_4 = "enemy-move-sound-4"
-    PLAYER_SHOOT_SOUND = "player-shoot-sound"
-    PLAYER_DEATH_SOUND = "player-death-sound"
-
-    # Enemy
-    ENEMY_ROW = "enemy-row"
-    ENEMY_COL = "enemy-col"
-    ENEMY_SIZE_WIDTH = "enemy-size-width"
-    ENEMY_SIZE_HEIGHT = "enemy-size-height"
-    ENEMY_SPEED = "enemy-speed"
-    ENEMY_FORMATION_GAP = "enemy-formation-gap"
-    ENEMY_FORMATION_MOVE_DOWN_DISTANCE = "enemy-formation-move-down-distance"
-    ENEMY_RESPAWN_TIMER_MS = "enemy-respawn-timer-ms"
-    ENEMY_MAX_BULLETS = "enemy-max-bullet"
-    ENEMY_STEP_INTERVAL = "enemy-step-interval"
-    ENEMY_MIN_FIRING_COOLDOWN = "enemy-min-firing-cooldown"
-    ENEMY_MAX_FIRING_COOLDOWN = "enemy-max-firing-cooldown"
-    ENEMY_ANIMATION_INTERVAL = "enemy-animation-interval"
-
-    # Player
-    PLAYER_SIZE_WIDTH = "player-size-width"
-    PLAYER_SIZE_HEIGHT = "player-size-height"
-    PLAYER_SPEED = "player-speed"
-    PLAYER_LIVES = "player-lives"
-    PLAYER_DEATH_TIMER_MS = "player-death-timer-ms"
-    PLAYER_START_Y_OFFSET = "player-start-y-offset"
-    PLAYABLE_AREA_OFFSET = "playable-area-offset"
-
-    # Bullet
-    PLAYER_BULLET_SPEED = "player-bullet-speed"
-    ENEMY_BULLET_SPEED = "enemy-bullet-speed"
-    BULLET_WIDTH = "bullet-width"
-    BULLET_HEIGHT = "bullet-height"
-
-    # Barrier
-    BARRIER_COUNT = "barrier-count"
-    BARRIER_WIDTH = "barrier-width"
-    BARRIER_HEIGHT = "barrier-height"
-    BARRIER_DAMAGED_WIDTH = "barrier-damaged-width"
-    BARRIER_DAMAGED_HEIGHT = "barrier-damaged-height"
-
-
+from functools import lru_cache
+
+
+DEFAULT_CONFIG_PATH = "./config.toml"
+
+
+class SoundKey(Enum):
+    # Values are the matching SoundConfig field names
+    ENEMY_MOVE_SOUND_1 = "enemy_move_sound_1"
+    ENEMY_MOVE_SOUND_2 = "enemy_move_sound_2"
+    ENEMY_MOVE_SOUND_3 = "enemy_move_sound_3"
+    ENEMY_MOVE_SOUND_4 = "enemy_move_sound_4"
+    PLAYER_SHOOT_SOUND = "player_shoot_sound"
+    PLAYER_DEATH_SOUND = "player_death_sound"
+
+
+@dataclass(frozen=True, slots=True)
+class DisplayConfig:
+    screen_width: int = 600
+    screen_height: int = 800
+    fps: int = 60
+    screen_color: str = "black"
+    text_color: str = "white"
+    game_title: str = "Space Invaders"
+    game_icon_path: str = "./assets/icon.png"
+    dirty_rect_rendering: bool = False
+    frame_profiler: bool = False
+    profile_capture_frames: int = 300
+    # Most ticks run on top of the first in one rendered frame to catch up
+    # when frames overrun; past that the game slows down instead
+    max_frame_skip: int = 4
+    # F6 frame capture, "zlib" stream or "png" sequence; when the encoder has
+    # all buffers queued frames are dropped, or with "block" briefly waited for
+    capture_format: str = "zlib"
+    capture_buffers: int = 8
+    capture_backpressure: str = "drop"
+
+
+@dataclass(frozen=True, slots=True)
+class FontConfig:
+    font_path: str = "./assets/fonts/pixel-game.regular.otf"
+    base_font_size: int = 26
+    large_font_size: int = 40
+
+
+@dataclass(frozen=True, slots=True)
+class AssetConfig:
+    spritesheet_path: str = "./assets/sprites/SpaceInvadersSpriteSheet.png"
+
+
+@dataclass(frozen=True, slots=True)
+class SoundConfig:
+    enemy_move_sound_1: str = "./assets/audios/fastinvader1.wav"
+    enemy_move_sound_2: str = "./assets/audios/fastinvader2.wav"
+    enemy_move_sound_3: str = "./assets/audios/fastinvader3.wav"
+    enemy_move_sound_4: str = "./assets/audios/fastinvader4.wav"
+    player_shoot_sound: str = "./assets/audios/shoot.wav"
+    player_death_sound: str = "./assets/audios/explosion.wav"
+
+    def paths(self) -> dict[SoundKey, str]:
+        return {key: getattr(self, key.value) for key in SoundKey}
+
+
+@dataclass(frozen=True, slots=True)
+class GameplayConfig:
+    playable_area_offset: int = 10
+    player_start_y_offset: int = 80
+    enemy_bullet_speed: float = 300
+    player_bullet_speed: float = 500
+    bullet_width: int = 8
+    bullet_height: int = 20
+    # Simulation ticks per second, independent of the display rate; 0 steps
+    # once per rendered frame by however long that frame took
+    tick_rate: int = 60
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerConfig:
+    width: int = 40
+    height: int = 20
+    speed: float = 200
+    lives: int = 3
+    death_timer_ms: float = 2000
+
+
+@dataclass(frozen=True, slots=True)
+class EnemyFormationConfig:
+    # "classic" or "swarm", the object-free layout for very large formations
+    layout: str = "classic"
+    rows: int = 5
+    cols: int = 5
+    enemy_width: int = 40
+    enemy_height: int = 20
+    speed: float = 0.01
+    gap: float = 20
+    move_down_distance: float = 20
+    respawn_timer_ms: float = 2000
+    max_bullets: int = 3
+    min_firing_cooldown: float = 1
+    max_firing_cooldown: float = 2
+    step_interval: float = 1
+    animation_interval: float = 1
+
+
+@dataclass(frozen=True, slots=True)
+class BarrierConfig:
+    count: int = 4
+    width: int = 80
+    height: int = 30
+    damaged_width: int = 30
+    damaged_height: int = 30
+
+
+@dataclass(frozen=True, slots=True)
 class Config:
-    def __init__(self) -> None:
-        pass
-
-    def display_config(self):
-        return {
-            ConfigKey.SCREEN_WIDTH: 600,
-            ConfigKey.SCREEN_HEIGHT: 800,
-            ConfigKey.FPS: 60,
-            ConfigKey.SCREEN_COLOR: "black",
-            ConfigKey.TEXT_COLOR: "white",
-            ConfigKey.GAME_TITLE: "Space Invaders",
-            ConfigKey.GAME_ICON_PATH: "./assets/icon.png"
-        }
-
-    def font_config(self):
-        return {
-            ConfigKey.FONT_PATH: "./assets/fonts/pixel-game.regular.otf",
-            ConfigKey.BASE_FONT_SIZE: 26,
-            ConfigKey.LARGE_FONT_SIZE: 40,
-        }
-
-    def asset_config(self):
-        return {
-            ConfigKey.SPRITESHEET_PATH: "./assets/sprites/SpaceInvadersSpriteSheet.png",
-        }
-
-    def sound_config(self):
-        return {
-            ConfigKey.ENEMY_MOVE_SOUND_1: "./assets/audios/fastinvader1.wav",
-            ConfigKey.ENEMY_MOVE_SOUND_2: "./assets/audios/fastinvader2.wav",
-            ConfigKey.ENEMY_MOVE_SOUND_3: "./assets/audios/fastinvader3.wav",
-            ConfigKey.ENEMY_MOVE_SOUND_4: "./assets/audios/fastinvader4.wav",
-            ConfigKey.PLAYER_SHOOT_SOUND: "./assets/audios/shoot.wav",
-            ConfigKey.PLAYER_DEATH_SOUND: "./assets/audios/explosion.wav",
-        }
-
-    def gameplay_config(self):
-        return {
-            # Player
-            ConfigKey.PLAYABLE_AREA_OFFSET: 10,
-            ConfigKey.PLAYER_START_Y_OFFSET: 80,
-            # Bullet
-            ConfigKey.ENEMY_BULLET_SPEED: 300,
-            ConfigKey.PLAYER_BULLET_SPEED: 500,
-            ConfigKey.BULLET_WIDTH: 8,
-            ConfigKey.BULLET_HEIGHT: 20,
-        }
-
-    def player_config(self):
-        return {
-            ConfigKey.PLAYER_SIZE_WIDTH: 40,
-            ConfigKey.PLAYER_SIZE_HEIGHT: 20,
-            ConfigKey.PLAYER_SPEED: 200,
-            ConfigKey.PLAYER_LIVES: 3,
-            ConfigKey.PLAYER_DEATH_TIMER_MS: 2000,
-        }
-
-    def enemy_formation_config(self):
-        return {
-            ConfigKey.ENEMY_ROW: 5,
-            ConfigKey.ENEMY_COL: 5,
-            ConfigKey.ENEMY_SIZE_WIDTH: 40,
-            ConfigKey.ENEMY_SIZE_HEIGHT: 20,
-            ConfigKey.ENEMY_SPEED: 0.01,
-            ConfigKey.ENEMY_FORMATION_GAP: 20,
-            ConfigKey.ENEMY_FORMATION_MOVE_DOWN_DISTANCE: 20,
-            ConfigKey.ENEMY_RESPAWN_TIMER_MS: 2000,
-            ConfigKey.ENEMY_MAX_BULLETS: 3,
-            ConfigKey.ENEMY_MIN_FIRING_COOLDOWN: 1,
-            ConfigKey.ENEMY_MAX_FIRING_COOLDOWN: 2,
-            ConfigKey.ENEMY_STEP_INTERVAL: 1,
-            ConfigKey.ENEMY_ANIMATION_INTERVAL: 1,
-        }
-
-    def barrier_config(self):
-        return {
-            ConfigKey.BARRIER_COUNT: 4,
-            ConfigKey.BARRIER_WIDTH: 80,
-            ConfigKey.BARRIER_HEIGHT: 30,
-            ConfigKey.BARRIER_DAMAGED_WIDTH: 30,
-            ConfigKey.BARRIER_DAMAGED_HEIGHT: 30,
-        }
+    """
+    Immutable game configuration, one frozen section per subsystem.
+
+    Build it once with `load_config` and hand the sections to components by
+    reference; nothing should construct its own.
+    """
+
+    display: DisplayConfig = field(default_factory=DisplayConfig)
+    font: FontConfig = field(default_factory=FontConfig)
+    asset: AssetConfig = field(default_factory=AssetConfig)
+    sound: SoundConfig = field(default_factory=SoundConfig)
+    gameplay: GameplayConfig = field(default_factory=GameplayConfig)
+    player: PlayerConfig = field(default_factory=PlayerConfig)
+    enemy_formation: EnemyFormationConfig = field(default_factory=EnemyFormationConfig)
+    barrier: BarrierConfig = field(default_factory=BarrierConfig)
+
+    def with_overrides(self, overrides: dict) -> "Config":
+        """
+        Copy with some values replaced.
+
+        Accepts nested sections ({"player": {"lives": 5}}) as found in config
+        files, or dotted keys ({"player.lives": 5}) as given on the command line.
+        """
+        sections: dict[str, dict] = {}
+        for key, value in overrides.items():
+            if isinstance(value, dict):
+                sections.setdefault(key, {}).update(value)
+            else:
+                section, _, name = key.partition(".")
+                if not name:
+                    raise ValueError(f"Config override {key!r} is not section.field")
+                sections.setdefault(section, {})[name] = value
+
+        replaced = {}
+        for section, values in sections.items():
+            if section not in self.__dataclass_fields__:
+                raise ValueError(f"Unknown config section {section!r}")
+            current = getattr(self, section)
+            known = {f.name for f in dataclasses.fields(current)}
+            unknown = values.keys() - known
+            if unknown:
+                raise ValueError(
+                    f"Unknown {section} config fields: {', '.join(sorted(unknown))}"
+                )
+            replaced[section] = dataclasses.replace(current, **values)
+        return dataclasses.replace(self, **replaced)
+
+
+def read_config_file(path: str) -> dict:
+    if path.endswith(".json"):
+        with open(path) as file:
+            return json.load(file)
+    with open(path, "rb") as file:
+        return tomllib.load(file)
+
+
+def load_config(
+    path: str | None = None,
+    profile: str | None = None,
+    overrides: dict | None = None,
+) -> Config:
+    """
+    Defaults, then the file's sections, then a named profile from its
+    [profiles.<name>] table, then explicit overrides.
+
+    Without a path the default config.toml is used if there is one.
+    """
+    if path is None and os.path.exists(DEFAULT_CONFIG_PATH):
+        path = DEFAULT_CONFIG_PATH
+    data = read_config_file(path) if path is not None else {}
+    profiles = data.pop("profiles", {})
+
+    config = Config().with_overrides(data)
+    if profile is not None:
+        if profile not in profiles:
+            raise ValueError(f"Config profile {profile!r} not found")
+        config = config.with_overrides(profiles[profile])
+    if overrides:
+        config = config.with_overrides(overrides)
+    return config
+
+
+@lru_cache(maxsize=1)
+def default_config() -> Config:
+    """Shared fallback for components built without a config."""
+    return Config()
@@ -1,9 +1,12 @@
+import numpy as np
 import pygame
 import random
 from typing import Literal
-from bullet import Bullet
+from audio import AudioManager, NullAudioBackend
+from bullet import BulletPool, BulletSource
+from formation_lattice import FormationLattice
 from sprite_manager import SpriteManager, SpriteKey
-from config import Config, ConfigKey
+from config import Config, SoundKey, default_config
 
 
 class Enemy(pygame.sprite.Sprite):
@@ -24,7 +27,13 @@ class Enemy(pygame.sprite.Sprite):
         self.speed = speed
         self.point = point
 
-        self.sprites = [pygame.transform.scale(sprite, size) for sprite in sprites]
+        # Formations pass sprites already scaled and shared between enemies
+        self.sprites = [
+            sprite
+            if sprite.get_size() == size
+            else pygame.transform.scale(sprite, size)
+            for sprite in sprites
+        ]
         self.max_sprites_index = len(self.sprites) - 1
         self.curr_sprite_index = 0
         self.rect = self.sprites[self.curr_sprite_index].get_rect()
@@ -33,12 +42,16 @@ class Enemy(pygame.sprite.Sprite):
 
         # Use config for animation interval
         if config is None:
-            config = Config()
-        formation_config = config.enemy_formation_config()
-        self.animation_interval = formation_config[ConfigKey.ENEMY_ANIMATION_INTERVAL]
-        self.animation_interval_reset = formation_config[
-            ConfigKey.ENEMY_ANIMATION_INTERVAL
-        ]
+            config = default_config()
+        self.animation_interval = config.enemy_formation.animation_interval
+        self.animation_interval_reset = config.enemy_formation.animation_interval
+
+    def reset(self):
+        """Back to the spawn position and first animation frame."""
+        self.rect.x = self.position.x
+        self.rect.y = self.position.y
+        self.curr_sprite_index = 0
+        self.animation_interval = self.animation_interval_reset
 
     def move_horizontally(self, distance: float):
         self.rect.x += distance
@@ -112,111 +125,145 @@ class EnemyFormation:
         enemy_size: tuple[float, float] | None = None,
         enemy_start_pos: pygame.Vector2 | None = None,
         enemy_speed: float | None = None,
+        rng: random.Random | None = None,
+        audio: AudioManager | None = None,
     ) -> None:
         # Use config defaults if parameters are None
         if config is None:
-            config = Config()
+            config = default_config()
 
-        formation_config = config.enemy_formation_config()
+        formation_config = config.enemy_formation
         self.config = config  # Store config for passing to enemies
 
         self.move_down_distance = (
             move_down_distance
             if move_down_distance is not None
-            else formation_config[ConfigKey.ENEMY_FORMATION_MOVE_DOWN_DISTANCE]
+            else formation_config.move_down_distance
         )
         # To prevent moving down immediately on start
         self.can_move_down = False
 
-        self.enemy_col = (
-            enemy_col
-            if enemy_col is not None
-            else formation_config[ConfigKey.ENEMY_COL]
-        )
-        self.enemy_row = (
-            enemy_row
-            if enemy_row is not None
-            else formation_config[ConfigKey.ENEMY_ROW]
-        )
+        self.enemy_col = enemy_col if enemy_col is not None else formation_config.cols
+        self.enemy_row = enemy_row if enemy_row is not None else formation_config.rows
         self.enemy_formation_gap = (
             enemy_formation_gap
             if enemy_formation_gap is not None
-            else formation_config[ConfigKey.ENEMY_FORMATION_GAP]
+            else formation_config.gap
         )
         self.enemy_size = (
             enemy_size
             if enemy_size is not None
-            else (
-                formation_config[ConfigKey.ENEMY_SIZE_WIDTH],
-                formation_config[ConfigKey.ENEMY_SIZE_HEIGHT],
-            )
+            else (formation_config.enemy_width, formation_config.enemy_height)
         )
         self.enemy_start_pos = (
             enemy_start_pos if enemy_start_pos is not None else pygame.Vector2(50, 50)
         )
         self.enemy_speed = (
-            enemy_speed
-            if enemy_speed is not None
-            else formation_config[ConfigKey.ENEMY_SPEED]
+            enemy_speed if enemy_speed is not None else formation_config.speed
         )
 
+        # Own random source so seeded games are reproducible
+        self.rng = rng if rng is not None else random.Random()
+
         self.horizontal_direction = 1
         self.left_limit = left_limit
         self.right_limit = right_limit
+        # Enemies stay in their grid cell for the whole wave, kills only
+        # clear the cell in the alive bitmap
         self.enemies: list[list[Enemy]] = [
             [None] * self.enemy_row for _ in range(0, self.enemy_col)
         ]
-        self.step_interval = formation_config[ConfigKey.ENEMY_STEP_INTERVAL]
-        self.current_step = formation_config[ConfigKey.ENEMY_STEP_INTERVAL]
+        self.alive = np.ones((self.enemy_col, self.enemy_row), dtype=bool)
+        # Live counts per column and row, kept up to date on kill so the
+        # formation's extents never need a scan
+        self.col_counts: list[int] = []
+        self.row_counts: list[int] = []
+        self.left_col = 0
+        self.right_col = self.enemy_col - 1
+        self.lowest_row = 0
+        self.update_extents()
+        self.lattice = FormationLattice(
+            cols=self.enemy_col,
+            rows=self.enemy_row,
+            cell_size=self.enemy_size,
+            gap=self.enemy_formation_gap,
+        )
+        self.step_interval = formation_config.step_interval
+        self.current_step = formation_config.step_interval
         self.wave_count = 0
 
         self.can_move = True
         self.enemy_count = self.enemy_col * self.enemy_row
-        self.respawn_timer = formation_config.get(ConfigKey.ENEMY_RESPAWN_TIMER_MS)
-
-        self.bullets: list[Bullet] = []
-        self.max_bullets = formation_config[ConfigKey.ENEMY_MAX_BULLETS]
-        self.min_firing_cooldown: float = formation_config[
-            ConfigKey.ENEMY_MIN_FIRING_COOLDOWN
-        ]
-        self.max_firing_cooldown: float = formation_config[
-            ConfigKey.ENEMY_MAX_FIRING_COOLDOWN
-        ]
-        self.enemy_firing_cooldown = random.uniform(
+        self.respawn_timer = formation_config.respawn_timer_ms
+
+        self.max_bullets = formation_config.max_bullets
+        self.bullets = BulletPool(
+            capacity=self.max_bullets,
+            sprite_manager=sprite_manager,
+            sprite_keys={BulletSource.ENEMY: SpriteKey.ENEMY_BULLET},
+            config=config,
+        )
+        self.min_firing_cooldown: float = formation_config.min_firing_cooldown
+        self.max_firing_cooldown: float = formation_config.max_firing_cooldown
+        self.enemy_firing_cooldown = self.rng.uniform(
             self.min_firing_cooldown, self.max_firing_cooldown
         )
 
-        octopus_sprites = sprite_manager.get_sprites(SpriteKey.OCTOPUS_ENEMY)
-        crab_sprites = sprite_manager.get_sprites(SpriteKey.CRAB_ENEMY)
-        squid_sprites = sprite_manager.get_sprites(SpriteKey.SQUID_ENEMY)
         self.sprites = {
-            SpriteKey.OCTOPUS_ENEMY: octopus_sprites,
-            SpriteKey.CRAB_ENEMY: crab_sprites,
-            SpriteKey.SQUID_ENEMY: squid_sprites,
+            key: sprite_manager.get_scaled(key, self.enemy_size).surfaces
+            for key in (
+                SpriteKey.OCTOPUS_ENEMY,
+                SpriteKey.CRAB_ENEMY,
+                SpriteKey.SQUID_ENEMY,
+            )
         }
 
-        sound_config = config.sound_config()
+        self.audio = (
+            audio if audio is not None else AudioManager(NullAudioBackend(), config)
+        )
         self.move_sounds = [
-            pygame.mixer.Sound(sound_config[ConfigKey.ENEMY_MOVE_SOUND_1]),
-            pygame.mixer.Sound(sound_config[ConfigKey.ENEMY_MOVE_SOUND_2]),
-            pygame.mixer.Sound(sound_config[ConfigKey.ENEMY_MOVE_SOUND_3]),
-            pygame.mixer.Sound(sound_config[ConfigKey.ENEMY_MOVE_SOUND_4]),
+            SoundKey.ENEMY_MOVE_SOUND_1,
+            SoundKey.ENEMY_MOVE_SOUND_2,
+            SoundKey.ENEMY_MOVE_SOUND_3,
+            SoundKey.ENEMY_MOVE_SOUND_4,
         ]
         self.move_sound_index = 0
         self.move_sound_max_index = len(self.move_sounds) - 1
 
         self.create_enemies_list()
 
-    def respawn_enemies_list(self):
+    def reset(self):
+        """Restore the formation to the start of a new game, reusing every enemy."""
+        self.wave_count = 0
+        self.current_step = self.step_interval
+        self.can_move = True
+        self.move_sound_index = 0
+        self.bullets.clear()
+        self.enemy_firing_cooldown = self.rng.uniform(
+            self.min_firing_cooldown, self.max_firing_cooldown
+        )
+        self.restore_grid()
+
+    def reset_wave(self):
+        """Bring the whole grid back for the next, faster wave."""
+        self.wave_count = self.wave_count + 1
+        self.restore_grid()
+
+    def restore_grid(self):
         self.horizontal_direction = 1
-        self.enemy_count = self.enemy_col * self.enemy_row
-        self.enemies = [[None] * self.enemy_row for _ in range(0, self.enemy_col)]
+        self.alive[:] = True
+        self.update_extents()
         self.can_move_down = False
-        self.wave_count = self.wave_count + 1
-        self.create_enemies_list()
+        self.reset_positions()
+
+    def reset_positions(self):
+        self.anchor.topleft = self.start_origin
+        for column in self.enemies:
+            for enemy in column:
+                enemy.reset()
 
     def despawn_bullets(self):
-        self.bullets = []
+        self.bullets.clear()
 
     def create_enemies_list(self):
         for col in range(0, self.enemy_col):
@@ -256,27 +303,96 @@ class EnemyFormation:
                         sprites=self.sprites[SpriteKey.SQUID_ENEMY],
                         config=self.config,
                     )
+        # Cell (0, 0), the formation moves as one so only it is moved and every
+        # enemy keeps its spawn offset from it
+        self.anchor = pygame.Rect(self.enemies[0][0].rect)
+        self.start_origin = self.anchor.topleft
+        self.cell_offsets = [
+            [
+                (enemy.rect.x - self.anchor.x, enemy.rect.y - self.anchor.y)
+                for enemy in column
+            ]
+            for column in self.enemies
+        ]
 
-    def auto_shoot(self, delta_time: float, sprites: list[pygame.Surface], speed=100):
-        for col in self.enemies:
-            for i in range(0, len(col)):
-                enemy = col[i]
-                if (
-                    i == 0
-                    and len(self.bullets) < self.max_bullets
-                    and self.enemy_firing_cooldown < 0
-                ):
-                    can_shoot = bool(random.randint(0, 1))
-                    if can_shoot:
-                        bullet_pos = pygame.Vector2(
-                            x=enemy.rect.x + enemy.size[0] / 2, y=enemy.rect.y
-                        )
-                        self.bullets.append(
-                            Bullet(position=bullet_pos, speed=speed, sprites=sprites)
-                        )
-                        self.enemy_firing_cooldown = random.uniform(
-                            self.min_firing_cooldown, self.max_firing_cooldown
-                        )
+    def set_alive(self, alive: np.ndarray):
+        self.alive[:] = alive
+        self.update_extents()
+
+    def update_extents(self):
+        """Recount everything from the alive bitmap, after it was replaced."""
+        self.col_counts = self.alive.sum(axis=1).tolist()
+        self.row_counts = self.alive.sum(axis=0).tolist()
+        self.enemy_count = sum(self.col_counts)
+        live_cols = np.flatnonzero(self.col_counts)
+        live_rows = np.flatnonzero(self.row_counts)
+        if len(live_cols) > 0:
+            self.left_col = int(live_cols[0])
+            self.right_col = int(live_cols[-1])
+            self.lowest_row = int(live_rows[0])
+
+    def lowest_alive_row(self, col: int) -> int | None:
+        column = self.alive[col]
+        if not column.any():
+            return None
+        return int(column.argmax())
+
+    def origin(self) -> tuple[int, int]:
+        """Top left of cell (0, 0), every other cell is laid out from it."""
+        return self.anchor.topleft
+
+    def cell_topleft(self, col: int, row: int) -> tuple[int, int]:
+        offset_x, offset_y = self.cell_offsets[col][row]
+        return (self.anchor.x + offset_x, self.anchor.y + offset_y)
+
+    def point_at(self, col: int, row: int) -> float:
+        return self.enemies[col][row].point
+
+    def positions(self) -> np.ndarray:
+        """The origin as an int32 array, the part of the layout that moves."""
+        return np.array([self.anchor.topleft], dtype=np.int32)
+
+    def set_positions(self, positions: np.ndarray):
+        self.anchor.topleft = positions[0].tolist()
+
+    def hit_test(self, rect: pygame.Rect) -> tuple[int, int] | None:
+        return self.lattice.hit_test(rect, self.origin(), self.alive)
+
+    def kill(self, col: int, row: int) -> float:
+        """Clear a cell, returns the points it was worth."""
+        self.alive[col, row] = False
+        self.enemy_count -= 1
+        self.col_counts[col] -= 1
+        self.row_counts[row] -= 1
+        # Extents only ever shrink during a wave, so this is O(1) amortised
+        if self.enemy_count > 0:
+            while self.col_counts[self.left_col] == 0:
+                self.left_col += 1
+            while self.col_counts[self.right_col] == 0:
+                self.right_col -= 1
+            while self.row_counts[self.lowest_row] == 0:
+                self.lowest_row += 1
+        return self.point_at(col, row)
+
+    def auto_shoot(self, delta_time: float, speed=100):
+        for col in range(0, self.enemy_col):
+            if (
+                len(self.bullets) >= self.max_bullets
+                or self.enemy_firing_cooldown >= 0
+            ):
+                break
+            # Only the lowest live enemy of a column can shoot
+            row = self.lowest_alive_row(col)
+            if row is None:
+                continue
+            can_shoot = bool(self.rng.randint(0, 1))
+            if can_shoot:
+                x, y = self.cell_topleft(col, row)
+                bullet_pos = pygame.Vector2(x=x + self.enemy_size[0] / 2, y=y)
+                self.bullets.spawn(bullet_pos, speed, BulletSource.ENEMY)
+                self.enemy_firing_cooldown = self.rng.uniform(
+                    self.min_firing_cooldown, self.max_firing_cooldown
+                )
 
         self.enemy_firing_cooldown -= delta_time
 
@@ -290,10 +406,8 @@ class EnemyFormation:
             self.move_down()
             self.can_move_down = False
         else:
-            for row in self.enemies:
-                for enemy in row:
-                    enemy.move_horizontally(enemy.size[0] * self.horizontal_direction)
-                    pygame.mixer.Sound.play(self.move_sounds[self.move_sound_index])
+            self.move_horizontally(self.enemy_size[0] * self.horizontal_direction)
+            self.audio.play(self.move_sounds[self.move_sound_index])
             self.move_sound_index += 1
             if self.move_sound_index > self.move_sound_max_index:
                 self.move_sound_index = 0
@@ -302,11 +416,7 @@ class EnemyFormation:
         self.current_step = self.step_interval
 
     def move_by_delta_time(self, delta_time: float):
-        for row in self.enemies:
-            for enemy in row:
-                enemy.move_horizontally(
-                    enemy.speed * delta_time * self.horizontal_direction
-                )
+        self.move_horizontally(self.enemy_speed * delta_time * self.horizontal_direction)
 
         if self.is_past_horizontal_bound():
             self.reverse_direction()
@@ -320,33 +430,35 @@ class EnemyFormation:
         else:
             self.move_by_delta_time(delta_time)
 
+    def move_horizontally(self, distance: float):
+        self.anchor.x += distance
+
     def move_down(self) -> None:
-        for row in self.enemies:
-            for enemy in row:
-                enemy.move_vertically(distance=self.move_down_distance)
+        self.anchor.y += self.move_down_distance
 
     def reverse_direction(self) -> None:
         self.horizontal_direction *= -1
 
     def is_past_horizontal_bound(self) -> bool:
-        enemy_list = list(map((lambda enemy: enemy.rect.x), sum(self.enemies, [])))
-        if len(enemy_list) == 0:
+        if self.enemy_count == 0:
             return False
-        pos_list = enemy_list
-        curr_left = min(pos_list)
-        curr_right = max(pos_list)
+        # Every enemy of a column shares its x
+        curr_left = self.cell_topleft(self.left_col, 0)[0]
+        curr_right = self.cell_topleft(self.right_col, 0)[0]
         if curr_left <= self.left_limit:
             return True
         if curr_right >= self.right_limit:
             return True
         return False
 
-    def collide_player(self, player):
-        for row in self.enemies:
-            for enemy in row:
-                if enemy.rect.colliderect(player):
-                    return True
-        return False
+    def collide_player(self, player) -> bool:
+        if self.enemy_count == 0:
+            return False
+        # Nothing to check until the lowest live row reaches the player
+        lowest_bottom = self.cell_topleft(0, self.lowest_row)[1] + self.enemy_size[1]
+        if lowest_bottom <= player.rect.top:
+            return False
+        return self.lattice.hit_test(player.rect, self.origin(), self.alive) is not None
 
     def stop_moving(self):
         self.can_move = False
@@ -354,7 +466,14 @@ class EnemyFormation:
     def resume_moving(self):
         self.can_move = True
 
-    def render(self, surface: pygame.Surface, delta_time: float):
-        for col in self.enemies:
-            for enemy in col:
-                enemy.render(surface, delta_time=delta_time)
+    def render(self, surface: pygame.Surface, delta_time: float) -> pygame.Rect | None:
+        """
+        Draw the live enemies. Always returns None, each enemy is a blit of its
+        own that the dirty rect renderer tracks, nothing is drawn on in place.
+        """
+        for col, row in np.argwhere(self.alive).tolist():
+            enemy = self.enemies[col][row]
+            # Enemies are only placed when drawn, the formation moves its origin
+            enemy.rect.topleft = self.cell_topleft(col, row)
+            enemy.render(surface, delta_time=delta_time)
+        return None
@@ -0,0 +1,229 @@
+import os
+import random
+import numpy as np
+import pygame
+from enum import IntEnum
+from typing import Literal
+from config import Config, load_config
+from replay import InputFlag, apply_frame, headless_tick_us
+from simulation import Simulation
+
+
+class Action(IntEnum):
+    NOOP = 0
+    LEFT = 1
+    RIGHT = 2
+    FIRE = 3
+    LEFT_FIRE = 4
+    RIGHT_FIRE = 5
+
+
+ACTION_FLAGS = {
+    Action.NOOP: InputFlag(0),
+    Action.LEFT: InputFlag.LEFT,
+    Action.RIGHT: InputFlag.RIGHT,
+    Action.FIRE: InputFlag.FIRE,
+    Action.LEFT_FIRE: InputFlag.LEFT | InputFlag.FIRE,
+    Action.RIGHT_FIRE: InputFlag.RIGHT | InputFlag.FIRE,
+}
+
+
+class SpaceInvadersEnv:
+    """
+    Gym-style wrapper around Game: `reset(seed)` and `step(action)`.
+
+    Observations are never allocated per step. The "state" vector is
+    refilled in place, and "pixels" is a view of the frame the game draws
+    into, optionally strided for downsampling or reduced into a preallocated
+    grayscale buffer. Either way the array returned is only valid until the
+    next step; copy it to keep it.
+    """
+
+    def __init__(
+        self,
+        config: Config | None = None,
+        observation: Literal["state", "pixels"] = "state",
+        downsample: int = 1,
+        grayscale: bool = False,
+        ticks_per_step: int = 1,
+        max_steps: int | None = None,
+        barrier_grid: tuple[int, int] = (4, 2),
+        headless: bool = True,
+    ) -> None:
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        # Imported late so the drivers above are picked up by pygame.init
+        from main import Game
+
+        if config is None:
+            config = load_config()
+        # Frames are drawn straight into the observation buffer
+        config = config.with_overrides(
+            {"display.dirty_rect_rendering": False, "display.frame_profiler": False}
+        )
+        self.config = config
+        self.observation = observation
+        self.ticks_per_step = ticks_per_step
+        self.max_steps = max_steps
+        self.tick_us = headless_tick_us(config)
+        self.seeds = random.Random()
+        self.steps = 0
+
+        self.game = Game(config)
+        self.game.finish_loading(wait=True)
+        self.simulation: Simulation = self.game.simulation
+
+        if observation == "state":
+            self.init_state(barrier_grid)
+        elif observation == "pixels":
+            self.init_pixels(downsample, grayscale)
+        else:
+            raise ValueError(f"Unknown observation mode {observation!r}")
+
+    @property
+    def action_count(self) -> int:
+        return len(Action)
+
+    def init_state(self, barrier_grid: tuple[int, int]):
+        formation = self.simulation.enemy_formation
+        barriers = self.simulation.barriers
+        sizes = {
+            "player_x": 1,
+            "formation_origin": 2,
+            "enemy_alive": formation.alive.size,
+            # x, y and active for every slot of the pool
+            "player_bullets": 3 * self.simulation.player.bullets.capacity,
+            "enemy_bullets": 3 * formation.bullets.capacity,
+            "barriers": len(barriers) * barrier_grid[0] * barrier_grid[1],
+        }
+        self.state = np.zeros(sum(sizes.values()), dtype=np.float32)
+        # Named views into the state vector, also handy for reading it back
+        self.state_views: dict[str, np.ndarray] = {}
+        offset = 0
+        for name, size in sizes.items():
+            self.state_views[name] = self.state[offset : offset + size]
+            offset += size
+        self.observation_shape = self.state.shape
+
+        # Barrier occupancy is recounted only when a barrier changed
+        self.barrier_grid = barrier_grid
+        self.barrier_revisions = [-1] * len(barriers)
+        width, height = barriers[0].mask.get_size()
+        self.barrier_cells = []
+        for gx in range(barrier_grid[0]):
+            for gy in range(barrier_grid[1]):
+                left = width * gx // barrier_grid[0]
+                right = width * (gx + 1) // barrier_grid[0]
+                top = height * gy // barrier_grid[1]
+                bottom = height * (gy + 1) // barrier_grid[1]
+                cell = pygame.mask.Mask((right - left, bottom - top), fill=True)
+                self.barrier_cells.append((cell, (left, top), cell.count()))
+
+    def init_pixels(self, downsample: int, grayscale: bool):
+        width, height = self.game.screen.get_size()
+        # The game draws into a surface over this buffer, so the observation
+        # is a view of it without pygame locking the surface while it's held
+        self.frame = np.zeros((height, width, 4), dtype=np.uint8)
+        self.canvas = pygame.image.frombuffer(self.frame, (width, height), "RGBX")
+        self.game.canvas = self.canvas
+        # Nearest neighbour downsampling is a strided view, still no copy
+        self.pixels = self.frame[::downsample, ::downsample, :3]
+        self.grayscale = grayscale
+        if grayscale:
+            shape = self.pixels.shape[:2]
+            self.gray = np.zeros(shape, dtype=np.uint8)
+            self.gray_sum = np.zeros(shape, dtype=np.uint16)
+            self.gray_term = np.zeros(shape, dtype=np.uint16)
+            self.observation_shape = shape
+        else:
+            self.observation_shape = self.pixels.shape
+
+    def reset(self, seed: int | None = None) -> tuple[np.ndarray, dict]:
+        if seed is None:
+            seed = self.seeds.randrange(2**32)
+        # Reseeded and reset in place, so a seed always replays the same episode
+        self.simulation.reset(seed)
+        if self.observation == "state":
+            self.barrier_revisions = [-1] * len(self.simulation.barriers)
+        self.steps = 0
+        return self.observe(), self.info()
+
+    def step(self, action: int) -> tuple[np.ndarray, float, bool, bool, dict]:
+        simulation = self.simulation
+        score = simulation.player.score
+        flags = ACTION_FLAGS[Action(action)]
+        for _ in range(self.ticks_per_step):
+            apply_frame(simulation, flags, self.tick_us)
+            if simulation.is_game_over:
+                break
+        self.steps += 1
+        reward = float(simulation.player.score - score)
+        terminated = simulation.is_game_over
+        truncated = self.max_steps is not None and self.steps >= self.max_steps
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def info(self) -> dict:
+        simulation = self.simulation
+        return {
+            "score": simulation.player.score,
+            "lives": simulation.player.lives,
+            "wave": simulation.enemy_formation.wave_count,
+            "tick": simulation.tick,
+        }
+
+    def observe(self) -> np.ndarray:
+        if self.observation == "state":
+            return self.observe_state()
+        return self.observe_pixels()
+
+    def observe_state(self) -> np.ndarray:
+        simulation = self.simulation
+        width, height = simulation.width, simulation.height
+        views = self.state_views
+        views["player_x"][0] = simulation.player.x / width
+        formation = simulation.enemy_formation
+        origin_x, origin_y = formation.origin()
+        views["formation_origin"][:] = (origin_x / width, origin_y / height)
+        np.copyto(views["enemy_alive"], formation.alive.ravel())
+        self.fill_pool(views["player_bullets"], simulation.player.bullets)
+        self.fill_pool(views["enemy_bullets"], formation.bullets)
+
+        grid = views["barriers"].reshape(len(simulation.barriers), -1)
+        for index, barrier in enumerate(simulation.barriers):
+            if self.barrier_revisions[index] == barrier.revision:
+                continue
+            self.barrier_revisions[index] = barrier.revision
+            for cell_index, (cell, offset, total) in enumerate(self.barrier_cells):
+                overlap = barrier.mask.overlap_area(cell, offset)
+                grid[index, cell_index] = overlap / total
+        return self.state
+
+    def fill_pool(self, view: np.ndarray, pool):
+        view = view.reshape(3, pool.capacity)
+        width, height = self.simulation.width, self.simulation.height
+        np.divide(pool.x, width, out=view[0])
+        np.divide(pool.y, height, out=view[1])
+        np.copyto(view[2], pool.active)
+
+    def observe_pixels(self) -> np.ndarray:
+        game = self.game
+        # Animations advance by the simulated time of the step
+        game.delta_time = self.tick_us * self.ticks_per_step / 1_000_000
+        self.canvas.fill(game.display_config.screen_color)
+        game.render_playing_scene()
+        if not self.grayscale:
+            return self.pixels
+        # Integer luma, (77 R + 150 G + 29 B) / 256, without temporaries
+        pixels = self.pixels
+        np.multiply(pixels[..., 0], 77, out=self.gray_sum, dtype=np.uint16)
+        np.multiply(pixels[..., 1], 150, out=self.gray_term, dtype=np.uint16)
+        self.gray_sum += self.gray_term
+        np.multiply(pixels[..., 2], 29, out=self.gray_term, dtype=np.uint16)
+        self.gray_sum += self.gray_term
+        np.right_shift(self.gray_sum, 8, out=self.gray_sum)
+        np.copyto(self.gray, self.gray_sum, casting="unsafe")
+        return self.gray
+
+    def close(self):
+        pygame.quit()
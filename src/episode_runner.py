@@ -0,0 +1,309 @@
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from typing import Callable, NamedTuple
+from config import Config, load_config
+from replay import InputFlag, apply_frame, headless_tick_us
+from simulation import Simulation
+
+# A policy picks each tick's inputs, it gets its own rng seeded from the episode
+Policy = Callable[[Simulation, random.Random], InputFlag]
+
+
+class EpisodeTask(NamedTuple):
+    seed: int
+    # Index into the runner's variants, each a set of config overrides
+    variant: int
+
+
+class EpisodeResult(NamedTuple):
+    seed: int
+    variant: int
+    score: int
+    wave_count: int
+    lives_lost: int
+    ticks: int
+    wall_time: float
+
+
+def idle_policy(simulation: Simulation, rng: random.Random) -> InputFlag:
+    return InputFlag(0)
+
+
+def random_policy(simulation: Simulation, rng: random.Random) -> InputFlag:
+    flags = InputFlag(0)
+    if rng.random() < 0.3:
+        flags |= InputFlag.LEFT
+    if rng.random() < 0.3:
+        flags |= InputFlag.RIGHT
+    if rng.random() < 0.1:
+        flags |= InputFlag.FIRE
+    return flags
+
+
+def tracking_policy(simulation: Simulation, rng: random.Random) -> InputFlag:
+    """Chase the lowest enemy of the nearest live column and keep firing."""
+    formation = simulation.enemy_formation
+    if formation.enemy_count == 0:
+        return InputFlag.FIRE
+    player = simulation.player
+    target = min(
+        (formation.left_col, formation.right_col),
+        key=lambda col: abs(formation.cell_topleft(col, 0)[0] - player.x),
+    )
+    target_x = formation.cell_topleft(target, 0)[0] + formation.enemy_size[0] / 2
+    center = player.x + player.size[0] / 2
+    flags = InputFlag.FIRE
+    if target_x < center - 4:
+        flags |= InputFlag.LEFT
+    elif target_x > center + 4:
+        flags |= InputFlag.RIGHT
+    return flags
+
+
+POLICIES: dict[str, Policy] = {
+    "idle": idle_policy,
+    "random": random_policy,
+    "tracking": tracking_policy,
+}
+
+
+def resolve_policy(name: str) -> Policy:
+    """A built-in policy name, or module:function for one of your own."""
+    if name in POLICIES:
+        return POLICIES[name]
+    module, _, attribute = name.partition(":")
+    if not attribute:
+        raise ValueError(
+            f"Unknown policy {name!r}, use one of {list(POLICIES)} or module:function"
+        )
+    return getattr(importlib.import_module(module), attribute)
+
+
+# Per worker process state, set up once by init_worker
+worker_state: dict = {}
+
+
+def init_worker(policy_name: str, configs: list[Config], max_ticks: int):
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    # SDL would turn the pool's SIGTERM into a quit event nobody reads
+    os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+    import pygame
+    from sprite_manager import SpriteManager
+
+    pygame.init()
+    worker_state["policy"] = resolve_policy(policy_name)
+    worker_state["configs"] = configs
+    worker_state["max_ticks"] = max_ticks
+    # Scaled sprites are cached here and shared by every episode of the worker
+    sprite_manager = SpriteManager(configs[0].asset.spritesheet_path)
+    # One simulation per variant, each episode resets it in place
+    worker_state["simulations"] = [
+        Simulation(sprite_manager=sprite_manager, config=config) for config in configs
+    ]
+
+
+def run_episode(task: EpisodeTask) -> EpisodeResult:
+    config = worker_state["configs"][task.variant]
+    policy = worker_state["policy"]
+    start = time.perf_counter()
+    simulation = worker_state["simulations"][task.variant]
+    simulation.reset(task.seed)
+    rng = random.Random(task.seed)
+    tick_us = headless_tick_us(config)
+    max_ticks = worker_state["max_ticks"]
+    # The same per-tick path as Game and replays
+    while not simulation.is_game_over and simulation.tick < max_ticks:
+        apply_frame(simulation, policy(simulation, rng), tick_us)
+
+    player = simulation.player
+    return EpisodeResult(
+        seed=task.seed,
+        variant=task.variant,
+        score=player.score,
+        wave_count=simulation.enemy_formation.wave_count,
+        lives_lost=player.start_lives - player.lives,
+        ticks=simulation.tick,
+        wall_time=time.perf_counter() - start,
+    )
+
+
+def run_episodes(
+    tasks: list[EpisodeTask],
+    configs: list[Config],
+    policy_name: str = "random",
+    processes: int | None = None,
+    chunksize: int = 16,
+    max_tasks_per_child: int | None = 100,
+    max_ticks: int = 60 * 60 * 10,
+    progress: Callable[[int, int], None] | None = None,
+):
+    """Yield results in completion order, spread over a process pool."""
+    # Spawned workers start clean instead of inheriting the parent's pygame
+    context = multiprocessing.get_context("spawn")
+    pool = context.Pool(
+        processes=processes,
+        initializer=init_worker,
+        initargs=(policy_name, configs, max_ticks),
+        maxtasksperchild=max_tasks_per_child,
+    )
+    try:
+        for done, result in enumerate(
+            pool.imap_unordered(run_episode, tasks, chunksize=chunksize), start=1
+        ):
+            if progress is not None:
+                progress(done, len(tasks))
+            yield result
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+class ProgressLine:
+    def __init__(self, stream=sys.stderr, interval: float = 0.5) -> None:
+        self.stream = stream
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last = 0.0
+
+    def __call__(self, done: int, total: int):
+        now = time.perf_counter()
+        if now - self.last < self.interval and done < total:
+            return
+        self.last = now
+        rate = done / (now - self.start)
+        remaining = (total - done) / rate if rate > 0 else 0
+        self.stream.write(
+            f"\r{done}/{total} episodes  {rate:.1f}/s  {remaining:.0f}s left  "
+        )
+        if done == total:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+def summarize(results: list[EpisodeResult], variant_names: list[str]) -> list[dict]:
+    summaries = []
+    for variant, name in enumerate(variant_names):
+        rows = [result for result in results if result.variant == variant]
+        if not rows:
+            continue
+        count = len(rows)
+        summaries.append(
+            {
+                "variant": name,
+                "episodes": count,
+                "mean_score": sum(row.score for row in rows) / count,
+                "mean_wave": sum(row.wave_count for row in rows) / count,
+                "mean_lives_lost": sum(row.lives_lost for row in rows) / count,
+                "mean_ticks": sum(row.ticks for row in rows) / count,
+                "ticks_per_second": sum(row.ticks for row in rows)
+                / sum(row.wall_time for row in rows),
+            }
+        )
+    return summaries
+
+
+def main():
+    from main import parse_override
+
+    parser = argparse.ArgumentParser(description="Run headless episodes on every core")
+    parser.add_argument(
+        "--episodes", type=int, default=1000, help="Episodes per variant"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="First episode seed")
+    parser.add_argument(
+        "--policy", default="random", help="random, idle, tracking or module:function"
+    )
+    parser.add_argument("--config", help="TOML or JSON config file")
+    parser.add_argument("--profile", help="Profile from the config file's [profiles]")
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="SECTION.FIELD=VALUE",
+        help="Override a config value for every variant, may be repeated",
+    )
+    parser.add_argument(
+        "--variant",
+        action="append",
+        default=[],
+        metavar="SECTION.FIELD=VALUE[,...]",
+        help="Extra config to compare, played on the same seeds, may be repeated",
+    )
+    parser.add_argument(
+        "--processes", type=int, help="Worker count, defaults to every core"
+    )
+    parser.add_argument("--chunksize", type=int, default=16)
+    parser.add_argument(
+        "--max-tasks-per-child",
+        type=int,
+        default=100,
+        help="Chunks a worker runs before it is replaced",
+    )
+    parser.add_argument(
+        "--max-ticks",
+        type=int,
+        default=60 * 60 * 10,
+        help="Cut episodes off after this many ticks",
+    )
+    parser.add_argument("--output", help="Write one JSON line per episode here")
+    args = parser.parse_args()
+
+    base = load_config(
+        args.config,
+        profile=args.profile,
+        overrides=dict(parse_override(text) for text in args.set),
+    )
+    variant_names = ["base"] + args.variant
+    configs = [base] + [
+        base.with_overrides(dict(parse_override(text) for text in variant.split(",")))
+        for variant in args.variant
+    ]
+    resolve_policy(args.policy)
+    tasks = [
+        EpisodeTask(seed=args.seed + index, variant=variant)
+        for index in range(args.episodes)
+        for variant in range(len(configs))
+    ]
+
+    results = []
+    output = open(args.output, "w") if args.output else None
+    try:
+        for result in run_episodes(
+            tasks,
+            configs,
+            policy_name=args.policy,
+            processes=args.processes,
+            chunksize=args.chunksize,
+            max_tasks_per_child=args.max_tasks_per_child,
+            max_ticks=args.max_ticks,
+            progress=ProgressLine(),
+        ):
+            results.append(result)
+            if output is not None:
+                output.write(json.dumps(result._asdict()) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+
+    for summary in summarize(results, variant_names):
+        print(
+            f"{summary['variant']:<40}{summary['episodes']:>8} episodes"
+            f"  score {summary['mean_score']:8.1f}  wave {summary['mean_wave']:5.2f}"
+            f"  lives lost {summary['mean_lives_lost']:4.2f}"
+            f"  ticks {summary['mean_ticks']:8.0f}"
+            f"  {summary['ticks_per_second']:8.0f} ticks/s per worker"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +0,0 @@
-import pygame
-
-PLAYER_REVIVE_EVENT = pygame.event.custom_type()
-RESPAWN_ENEMIES_LIST = pygame.event.custom_type()
@@ -0,0 +1,49 @@
+import math
+import numpy as np
+import pygame
+
+
+class FormationLattice:
+    """
+    Spatial index for a regular enemy grid.
+
+    Cell (col, row) sits at origin + (col * step_x, -row * step_y), so the
+    cells a rect can touch are found with a division instead of a scan.
+    """
+
+    def __init__(
+        self,
+        cols: int,
+        rows: int,
+        cell_size: tuple[float, float],
+        gap: float,
+    ) -> None:
+        self.cols = cols
+        self.rows = rows
+        self.cell_size = cell_size
+        self.step_x = cell_size[0] + gap
+        self.step_y = cell_size[1] + gap
+
+    def col_range(self, x: float, width: float, origin_x: float) -> range:
+        first = math.floor((x - origin_x - self.cell_size[0]) / self.step_x) + 1
+        last = math.ceil((x + width - origin_x) / self.step_x) - 1
+        return range(max(first, 0), min(last, self.cols - 1) + 1)
+
+    def row_range(self, y: float, height: float, origin_y: float) -> range:
+        # Rows grow upwards from the origin
+        first = math.floor((origin_y - y - height) / self.step_y) + 1
+        last = math.ceil((origin_y + self.cell_size[1] - y) / self.step_y) - 1
+        return range(max(first, 0), min(last, self.rows - 1) + 1)
+
+    def hit_test(
+        self, rect: pygame.Rect, origin: tuple[float, float], alive: np.ndarray
+    ) -> tuple[int, int] | None:
+        """First live cell overlapping rect, in column order then bottom-up."""
+        rows = self.row_range(rect.y, rect.height, origin[1])
+        if not rows:
+            return None
+        for col in self.col_range(rect.x, rect.width, origin[0]):
+            for row in rows:
+                if alive[col, row]:
+                    return (col, row)
+        return None
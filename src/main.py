@@ -1,10 +1,25 @@
+import argparse
+import math
+import os
 import pygame
-from player import Player
-from enemy import *
-from barrier import Barrier
-from sprite_manager import SpriteManager, SpriteKey
-from config import Config, ConfigKey
-from event import *
+import random
+import struct
+import time
+import tomllib
+import zlib
+from assets import AssetKey, AssetRegistry
+from audio import AudioManager
+from sprite_manager import SpriteManager
+from simulation import Simulation
+from replay import InputFlag, Replay, ReplayPlayer, ReplayRecorder, apply_frame
+from snapshot import SnapshotHistory
+import snapshot
+from profiler import FrameProfiler
+from capture import FrameCapture, default_capture_path
+from renderer import DirtyRectRenderer
+from text_layer import TextLayer
+from config import Config, load_config
+from collections import deque
 from enum import Enum
 
 
@@ -13,287 +28,396 @@ class GameScene(Enum):
     PLAYING = "playing"
 
 
+QUICKSAVE_PATH = "./quicksave.sav"
+# Frames averaged to decide whether the game is keeping to the fps budget
+FRAME_COST_WINDOW = 10
+
+
 class Game:
-    def __init__(self):
+    def __init__(
+        self,
+        config: Config | None = None,
+        seed: int | None = None,
+        record_path: str | None = None,
+        replay: Replay | None = None,
+        capture_path: str | None = None,
+    ):
         self.is_running = True
         pygame.init()
 
-        config = Config()
-        display_config = config.display_config()
-        font_config = config.font_config()
-        asset_config = config.asset_config()
-        gameplay_config = config.gameplay_config()
-        enemy_config = config.enemy_formation_config()
-        barrier_config = config.barrier_config()
+        if replay is not None:
+            config = replay.config
+        if config is None:
+            config = load_config()
+        display_config = config.display
 
-        self.gameplay_config = gameplay_config
+        self.config = config
         self.display_config = display_config
-        self.barrier_config = barrier_config
-        self.enemy_config = enemy_config
         self.current_scene = GameScene.MAIN_MENU
         self.high_score = 0
 
         self.screen = pygame.display.set_mode(
             (
-                display_config[ConfigKey.SCREEN_WIDTH],
-                display_config[ConfigKey.SCREEN_HEIGHT],
+                display_config.screen_width,
+                display_config.screen_height,
             )
         )
-        pygame.display.set_caption(display_config[ConfigKey.GAME_TITLE])
-        icon = pygame.image.load(display_config[ConfigKey.GAME_ICON_PATH])
-        pygame.display.set_icon(icon)
-        self.FPS = display_config[ConfigKey.FPS]
+        pygame.display.set_caption(display_config.game_title)
+        # Opt-in dirty rectangle rendering, objects draw onto the canvas either way
+        self.renderer = None
+        if display_config.dirty_rect_rendering:
+            self.renderer = DirtyRectRenderer(self.screen, display_config.screen_color)
+        self.canvas = self.renderer if self.renderer is not None else self.screen
+        self.FPS = display_config.fps
         self.clock = pygame.time.Clock()
         self.delta_time = 0
-        self.is_game_over = False
-        self.is_pause = False
-
-        self.base_pixel_font = pygame.font.Font(
-            font_config[ConfigKey.FONT_PATH], font_config[ConfigKey.BASE_FONT_SIZE]
-        )
-        self.large_pixel_font = pygame.font.Font(
-            font_config[ConfigKey.FONT_PATH], font_config[ConfigKey.LARGE_FONT_SIZE]
+        # The simulation runs in fixed ticks, frames render between the last two
+        self.tick_rate = config.gameplay.tick_rate
+        self.tick_us = (
+            round(1_000_000 / self.tick_rate) if self.tick_rate > 0 else None
         )
+        self.accumulator_us = 0
+        self.interpolation = 1.0
+        # Frame skipping, ticks run to catch up are never drawn
+        self.max_frame_skip = display_config.max_frame_skip
+        # Ticks beyond the tick_rate / fps a frame is expected to run
+        self.skipped_frames = 0
+        # Frames while the recent average frame cost was over the 1 / fps budget
+        self.overloaded_frames = 0
+        self.frame_costs: deque[int] = deque(maxlen=FRAME_COST_WINDOW)
+        self.dropped_us = 0
+        self.is_pause = False
+        self.fire_requested = False
+        self.restart_requested = False
+
+        # Every session can be recorded as a seed plus per-frame inputs
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.record_path = record_path
+        self.recorder: ReplayRecorder | None = None
+        self.replay = replay
+        self.replay_player: ReplayPlayer | None = None
+        # Per-frame snapshots, hold backspace to rewind
+        self.history = SnapshotHistory()
+        # F3 toggles the phase timing overlay, F4 captures a cProfile run
+        self.profiler: FrameProfiler | None = None
+        self.profiler_font: pygame.font.Font | None = None
+        # F6 toggles recording every presented frame
+        self.capture_path = capture_path
+        self.frame_capture: FrameCapture | None = None
+
+        self.text = TextLayer(display_config.text_color)
+
+        # Everything from disk is loaded once, in the background while the menu shows
+        self.assets = AssetRegistry(config)
+        self.assets.start_background_load()
+        self.base_pixel_font: pygame.font.Font | None = None
+        self.large_pixel_font: pygame.font.Font | None = None
+        self.sprite_manager: SpriteManager | None = None
+        self.audio: AudioManager | None = None
+        self.simulation: Simulation | None = None
+
+    def finish_loading(self, wait: bool = False):
+        """Pick up whatever the loader has finished, blocking for the rest if asked."""
+        if self.simulation is not None:
+            return
+        if wait:
+            self.assets.wait()
+        elif self.assets.error is not None:
+            raise self.assets.error
+
+        if self.large_pixel_font is None and self.assets.is_loaded(AssetKey.LARGE_FONT):
+            self.large_pixel_font = self.assets.get(AssetKey.LARGE_FONT)
+        if not self.assets.is_loaded():
+            return
 
-        sprite_manager = SpriteManager(asset_config[ConfigKey.SPRITESHEET_PATH])
-        self.sprite_manager = sprite_manager
-
-        self.player_bullet_sprites = sprite_manager.get_sprites(SpriteKey.PLAYER_BULLET)
-        self.enemy_bullet_sprites = sprite_manager.get_sprites(SpriteKey.ENEMY_BULLET)
-        self.init_player()
-        self.init_enemies()
-        self.init_barriers()
-        
-    def init_player(self):
-        player_start_pos = pygame.Vector2(
-            self.screen.get_width() / 2,
-            self.screen.get_height() - self.gameplay_config[ConfigKey.PLAYER_START_Y_OFFSET],
-        )
-        self.playable_area_offset = self.gameplay_config[ConfigKey.PLAYABLE_AREA_OFFSET]
-        player_sprites = self.sprite_manager.get_sprites(SpriteKey.PLAYER)
-        self.player = Player(position=player_start_pos, sprites=player_sprites)
-
-    def init_enemies(self):
-        self.enemy_formation = EnemyFormation(
-            left_limit=self.enemy_config[ConfigKey.ENEMY_SIZE_WIDTH],
-            right_limit=self.screen.get_width()
-            - self.enemy_config[ConfigKey.ENEMY_SIZE_WIDTH],
-            sprite_manager=self.sprite_manager,
-            enemy_start_pos=pygame.Vector2(5, self.screen.get_height() / 3),
+        self.base_pixel_font = self.assets.get(AssetKey.BASE_FONT)
+        pygame.display.set_icon(self.assets.get(AssetKey.GAME_ICON))
+        self.sprite_manager = SpriteManager(
+            self.config.asset.spritesheet_path,
+            spritesheet_image=self.assets.get(AssetKey.SPRITESHEET),
         )
-
-    def init_barriers(self):
-        # Calculate barriers start x to space them evenly
-        # Using player position and double barrier height for y
-        barrier_count = self.barrier_config[ConfigKey.BARRIER_COUNT]
-        barrier_width = self.barrier_config[ConfigKey.BARRIER_WIDTH]
-        barrier_spacing = (
-            self.screen.get_width() - (barrier_count * barrier_width)
-        ) / (barrier_count + 1)
-        self.barriers = [
-            Barrier(
-                sprites=self.sprite_manager.get_sprites(SpriteKey.BARRIER),
-                damaged_sprite=self.sprite_manager.get_sprites(SpriteKey.BARRIER_DAMAGED)[0],
-                position=(
-                    barrier_spacing + i * (barrier_width + barrier_spacing),
-                    self.screen.get_height()
-                    - self.gameplay_config[ConfigKey.PLAYER_START_Y_OFFSET]
-                    - self.barrier_config[ConfigKey.BARRIER_HEIGHT] * 2,
-                ),
+        self.audio = AudioManager(config=self.config, assets=self.assets)
+        if self.replay is not None:
+            self.replay_player = ReplayPlayer(
+                self.replay, sprite_manager=self.sprite_manager, audio=self.audio
             )
-            for i in range(0, barrier_count)
-        ]
+            self.simulation = self.replay_player.simulation
+        else:
+            self.simulation = Simulation(
+                sprite_manager=self.sprite_manager,
+                config=self.config,
+                seed=self.seed,
+                audio=self.audio,
+            )
+        if self.record_path is not None and self.replay is None:
+            self.recorder = ReplayRecorder(
+                self.simulation, Replay(self.seed, self.config)
+            )
+        if self.display_config.frame_profiler:
+            self.toggle_profiler()
+        if self.capture_path is not None:
+            self.toggle_capture(self.capture_path)
+
+    def toggle_profiler(self, capacity: int = 600):
+        if self.profiler is not None:
+            self.profiler.uninstrument()
+            self.profiler = None
+            return
+        profiler = FrameProfiler(capacity)
+        profiler.instrument("handle_events", self, "handle_events")
+        for phase in (
+            "update_bullets",
+            "update_player",
+            "update_enemies",
+            "update_player_collisions",
+        ):
+            profiler.instrument(phase, self.simulation, phase)
+        profiler.instrument("snapshot", self.history, "capture")
+        profiler.instrument("render_game_objects", self, "render_game_objects")
+        profiler.instrument("render_ui", self, "render_ui")
+        profiler.instrument("display.flip", self, "present")
+        profiler.instrument("capture", self, "capture_frame")
+        profiler.instrument("clock.tick", self, "tick_clock")
+        self.profiler = profiler
+        if self.profiler_font is None:
+            self.profiler_font = pygame.font.Font(None, 18)
+
+    def toggle_capture(self, path: str | None = None):
+        if self.frame_capture is not None:
+            self.frame_capture.close()
+            self.frame_capture = None
+            return
+        display_config = self.display_config
+        format = display_config.capture_format
+        self.frame_capture = FrameCapture(
+            self.screen,
+            path if path is not None else default_capture_path(format),
+            format=format,
+            buffers=display_config.capture_buffers,
+            backpressure=display_config.capture_backpressure,
+        )
 
     def start(self):
         while self.is_running:
+            if self.profiler is not None:
+                self.profiler.begin_frame()
             self.handle_events()
             self.update()
             self.render()
+        if self.recorder is not None:
+            self.recorder.replay.save(self.record_path)
+        if self.frame_capture is not None:
+            self.frame_capture.close()
         pygame.quit()
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.is_running = False
+            if event.type == pygame.WINDOWEXPOSED and self.renderer is not None:
+                self.renderer.invalidate()
+            if event.type == pygame.KEYDOWN and self.simulation is not None:
+                if event.key == pygame.K_F3:
+                    self.toggle_profiler()
+                if event.key == pygame.K_F4:
+                    if self.profiler is None:
+                        self.toggle_profiler()
+                    self.profiler.start_capture(
+                        self.display_config.profile_capture_frames,
+                        f"./frame-profile-{int(time.time())}.pstats",
+                    )
+                if event.key == pygame.K_F6:
+                    self.toggle_capture()
 
             match self.current_scene:
                 case GameScene.MAIN_MENU:
                     if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                        self.finish_loading(wait=True)
                         self.current_scene = GameScene.PLAYING
-                case GameScene.PLAYING:
+                case GameScene.PLAYING if self.replay_player is None:
                     if event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_ESCAPE:
                             self.is_pause = not self.is_pause
                         if event.key == pygame.K_SPACE:
-                            bullet_pos = pygame.Vector2(
-                                x=self.player.rect.x + self.player.size[0] / 2,
-                                y=self.player.rect.y,
-                            )
-                            bullet = Bullet(
-                                position=bullet_pos,
-                                speed=self.gameplay_config[
-                                    ConfigKey.PLAYER_BULLET_SPEED
-                                ],
-                                sprites=self.player_bullet_sprites,
-                            )
-                            self.player.shoot(bullet)
-                        if event.key == pygame.K_RETURN and self.is_game_over:
+                            self.fire_requested = True
+                        if (
+                            event.key == pygame.K_RETURN
+                            and self.simulation.is_game_over
+                        ):
                             self.restart()
-
-                    if event.type == PLAYER_REVIVE_EVENT:
-                        self.player.revive()
-
-                    if event.type == RESPAWN_ENEMIES_LIST:
-                        self.enemy_formation.respawn_enemies_list()
-                        self.enemy_formation.resume_moving()
-
-    def update(self):
-        if self.is_pause or self.player.is_dead:
+                        # A recording has to stay a straight run of inputs
+                        if event.key == pygame.K_F5:
+                            snapshot.save(QUICKSAVE_PATH, self.simulation)
+                        if event.key == pygame.K_F9 and self.recorder is None:
+                            self.quickload()
+
+    def quickload(self):
+        if not os.path.exists(QUICKSAVE_PATH):
             return
+        current = snapshot.capture(self.simulation)
+        try:
+            snapshot.load(QUICKSAVE_PATH, self.simulation)
+        except (OSError, ValueError, struct.error, zlib.error) as error:
+            # A bad save can fail part way through, so put the game back as it was
+            snapshot.restore(self.simulation, current)
+            print(f"Quickload failed: {error}")
+            return
+        self.history.clear()
+        self.history.capture(self.simulation)
 
+    def update(self):
+        self.finish_loading()
         match self.current_scene:
             case GameScene.MAIN_MENU:
                 pass
+            case GameScene.PLAYING if self.replay_player is not None:
+                for _ in self.due_ticks():
+                    if self.replay_player.is_finished():
+                        break
+                    flags = self.replay_player.step()
+                    self.is_pause = bool(flags & InputFlag.PAUSE)
             case GameScene.PLAYING:
-                self.update_bullets()
-                self.update_player()
-                self.update_enemies()
-                self.update_player_collisions()
-
-    def update_bullets(self):
-        self.update_player_bullets()
-        self.update_enemy_bullets()
-
-    def update_player_bullets(self):
-        player_bullets_to_remove: dict[Bullet, int] = {}
-        for bullet in self.player.bullets:
-            bullet.move_vertically(self.delta_time * bullet.speed * -1)
-
-            # Out of bound
-            if bullet.is_out_of_bound(0, self.screen.get_height()):
-                player_bullets_to_remove[bullet] = 1
-                continue
-
-            # Enemy collision
-            for col in self.enemy_formation.enemies:
-                collide_list = bullet.rect.collidelistall(col)
-                if len(collide_list) > 0:
-                    hit_enemy = col[collide_list[0]]
-                    self.player.score += hit_enemy.point
-                    col.remove(hit_enemy)
-                    player_bullets_to_remove[bullet] = 1
-                    self.enemy_formation.enemy_count -= 1
-                    if self.enemy_formation.enemy_count == 0:
-                        self.enemy_formation.despawn_bullets()
-                        self.enemy_formation.stop_moving()
-                        pygame.time.set_timer(
-                            RESPAWN_ENEMIES_LIST,
-                            self.enemy_formation.respawn_timer,
-                            1,
-                        )
-                    break
-            # Barrier collision
-            for barrier in self.barriers:
-                collide_point = barrier.mask.overlap(
-                    bullet.mask,
-                    (
-                        bullet.rect.x - barrier.rect.x,
-                        bullet.rect.y - barrier.rect.y,
-                    ),
-                )
-                if collide_point is not None:
-                    barrier.handle_damage(collide_point=collide_point)
-                    player_bullets_to_remove[bullet] = 1
-
-        for bullet in player_bullets_to_remove:
-            self.player.bullets.remove(bullet)
-
-    def update_enemy_bullets(self):
-        enemy_bullets_to_remove: dict[Bullet, int] = {}
-        for bullet in self.enemy_formation.bullets:
-            bullet.move_vertically(self.delta_time * bullet.speed)
-            # Out of bound
-            if bullet.is_out_of_bound(0, self.screen.get_height()):
-                enemy_bullets_to_remove[bullet] = 1
-                continue
-            # Player collision
-            if bullet.rect.colliderect(self.player):
-                self.player.lose_life()
-
-                if self.player.lives <= 0:
-                    self.delta_time = 0
-                    self.is_game_over = True
-                else:
-                    pygame.time.set_timer(
-                        PLAYER_REVIVE_EVENT, self.player.death_timer_ms, 1
-                    )
+                if (
+                    self.recorder is None
+                    and not self.is_pause
+                    and pygame.key.get_pressed()[pygame.K_BACKSPACE]
+                ):
+                    self.history.rewind(self.simulation)
+                    self.interpolation = 1.0
+                    return
+                for delta_us in self.due_ticks():
+                    self.run_tick(delta_us)
+
+    def due_ticks(self) -> list[int]:
+        """Delta times of the ticks to run this frame, in microseconds."""
+        # Clock ticks are whole milliseconds, so this is lossless
+        frame_us = round(self.delta_time * 1000) * 1000
+        max_ticks = self.max_frame_skip + 1
+        if self.tick_us is None:
+            # A frame that overran the fps budget is split into budget sized steps
+            count = 1
+            if self.FPS > 0:
+                count = max(frame_us * self.FPS // 1_000_000, 1)
+                # Past the cap the steps grow longer than the budget instead
+                count = min(count, max_ticks)
+            step, extra = divmod(frame_us, count)
+            ticks = [step + (index < extra) for index in range(count)]
+        else:
+            self.accumulator_us += frame_us
+            count = self.accumulator_us // self.tick_us
+            if count > max_ticks:
+                # Too far behind to catch up, give the time up rather than spiral
+                dropped_us = (count - max_ticks) * self.tick_us
+                self.accumulator_us -= dropped_us
+                self.dropped_us += dropped_us
+                count = max_ticks
+            self.accumulator_us -= count * self.tick_us
+            self.interpolation = self.accumulator_us / self.tick_us
+            ticks = [self.tick_us] * count
+        self.skipped_frames += max(len(ticks) - self.ticks_per_frame(), 0)
+        return ticks
+
+    def ticks_per_frame(self) -> int:
+        """Ticks a frame runs when the game keeps to the fps budget."""
+        if self.tick_us is None or self.FPS <= 0:
+            return 1
+        return math.ceil(self.tick_rate / self.FPS)
+
+    def run_tick(self, delta_us: int):
+        # Read per tick, so one-off inputs go to the first tick that runs
+        flags = self.read_input_flags()
+        if self.recorder is not None:
+            self.recorder.record(flags, delta_us)
+        apply_frame(self.simulation, flags, delta_us)
+        if not flags & InputFlag.PAUSE:
+            self.history.capture(self.simulation)
+
+    def read_input_flags(self) -> InputFlag:
+        flags = InputFlag(0)
+        if self.restart_requested:
+            flags |= InputFlag.RESTART
+            self.restart_requested = False
+        fire = self.fire_requested
+        self.fire_requested = False
+        if self.is_pause:
+            return flags | InputFlag.PAUSE
 
-                enemy_bullets_to_remove[bullet] = 1
-            # Barrier collision
-            for barrier in self.barriers:
-                collide_point = barrier.mask.overlap(
-                    bullet.mask,
-                    (
-                        bullet.rect.x - barrier.rect.x,
-                        bullet.rect.y - barrier.rect.y,
-                    ),
-                )
-                if collide_point is not None:
-                    barrier.handle_damage(collide_point=collide_point)
-                    enemy_bullets_to_remove[bullet] = 1
-
-        for bullet in enemy_bullets_to_remove:
-            self.enemy_formation.bullets.remove(bullet)
-
-    def update_player(self):
         keys_pressed = pygame.key.get_pressed()
         if keys_pressed[pygame.K_a] or keys_pressed[pygame.K_LEFT]:
-            self.player.move_left(
-                delta_time=self.delta_time, left_limit=self.playable_area_offset
-            )
+            flags |= InputFlag.LEFT
         if keys_pressed[pygame.K_d] or keys_pressed[pygame.K_RIGHT]:
-            self.player.move_right(
-                self.delta_time,
-                right_limit=self.screen.get_width()
-                - self.playable_area_offset
-                - self.player.size[0],
-            )
-
-    def update_enemies(self):
-        self.enemy_formation.auto_move(delta_time=self.delta_time, mode="step")
-        self.enemy_formation.auto_shoot(
-            delta_time=self.delta_time,
-            sprites=self.enemy_bullet_sprites,
-            speed=self.gameplay_config[ConfigKey.ENEMY_BULLET_SPEED],
-        )
-
-    def update_player_collisions(self):
-        if self.enemy_formation.collide_player(self.player):
-            self.player.lose_life()
-            if self.player.lives <= 0:
-                self.delta_time = 0
-                self.is_game_over = True
+            flags |= InputFlag.RIGHT
+        if fire:
+            flags |= InputFlag.FIRE
+        return flags
 
     def render(self):
-        self.screen.fill(self.display_config[ConfigKey.SCREEN_COLOR])
+        if self.renderer is None:
+            self.screen.fill(self.display_config.screen_color)
         match self.current_scene:
             case GameScene.MAIN_MENU:
                 self.render_main_menu()
             case GameScene.PLAYING:
                 self.render_playing_scene()
-
-        pygame.display.flip()
-
-        if not self.is_game_over:
-            self.delta_time = self.clock.tick(self.FPS) / 1000
+        if self.profiler is not None:
+            self.render_profiler()
+
+        self.present()
+        self.capture_frame()
+        self.tick_clock()
+
+    def present(self):
+        if self.renderer is None:
+            pygame.display.flip()
+        else:
+            self.renderer.present()
+
+    def capture_frame(self):
+        if self.frame_capture is not None:
+            self.frame_capture.capture()
+
+    def tick_clock(self):
+        self.delta_time = self.clock.tick(self.FPS) / 1000
+        # Time spent on the frame, without the wait that holds it to the fps
+        self.frame_costs.append(self.clock.get_rawtime())
+        if self.FPS > 0:
+            average_ms = sum(self.frame_costs) / len(self.frame_costs)
+            if average_ms > 1000 / self.FPS:
+                self.overloaded_frames += 1
+
+    def frame_stats(self) -> dict[str, int]:
+        """Frame pacing counters since the game started."""
+        return {
+            "skipped_frames": self.skipped_frames,
+            "overloaded_frames": self.overloaded_frames,
+            "dropped_ms": self.dropped_us // 1000,
+        }
+
+    def render_profiler(self):
+        formation = self.simulation.enemy_formation
+        counts = {
+            "enemies": formation.enemy_count,
+            "player bullets": len(self.simulation.player.bullets),
+            "enemy bullets": len(formation.bullets),
+        }
+        for name, count in self.frame_stats().items():
+            counts[name.replace("_", " ")] = count
+        if self.frame_capture is not None:
+            counts["capture backlog"] = self.frame_capture.backlog
+            counts["capture dropped"] = self.frame_capture.dropped
+        self.profiler.render_overlay(
+            self.canvas,
+            self.profiler_font,
+            self.display_config.text_color,
+            counts,
+            position=(4, 32),
+        )
 
     def render_main_menu(self):
-        play_surface = self.large_pixel_font.render(
-            f"PRESS  ENTER  TO  PLAY",
-            (0, 0, 0, 0),
-            self.display_config[ConfigKey.TEXT_COLOR],
-        )
-        self.screen.blit(
+        if self.large_pixel_font is None:
+            return
+        play_surface = self.text.label("PRESS  ENTER  TO  PLAY", self.large_pixel_font)
+        self.canvas.blit(
             play_surface,
             (
                 (self.screen.get_width() - play_surface.get_width()) / 2,
@@ -306,18 +430,24 @@ class Game:
         self.render_ui()
 
     def render_game_objects(self):
-        for bullet in self.player.bullets:
-            bullet.render(self.screen)
+        simulation = self.simulation
+        # A paused simulation doesn't step, so there is nothing to blend from
+        alpha = 1.0 if self.is_pause else self.interpolation
+        simulation.player.bullets.render(self.canvas, alpha)
+        simulation.enemy_formation.bullets.render(self.canvas, alpha)
 
-        for bullet in self.enemy_formation.bullets:
-            bullet.render(self.screen)
+        simulation.player.render(self.canvas, alpha)
 
-        self.player.render(self.screen)
-
-        self.enemy_formation.render(self.screen, delta_time=self.delta_time)
+        damaged_rect = simulation.enemy_formation.render(
+            self.canvas, delta_time=self.delta_time
+        )
+        if damaged_rect is not None and self.renderer is not None:
+            self.renderer.mark_dirty(damaged_rect)
 
-        for barrier in self.barriers:
-            barrier.render(surface=self.screen)
+        for barrier in simulation.barriers:
+            damaged_rect = barrier.render(surface=self.canvas)
+            if damaged_rect is not None and self.renderer is not None:
+                self.renderer.mark_dirty(damaged_rect)
 
     def render_ui(self):
         self.render_score_and_lives()
@@ -325,34 +455,26 @@ class Game:
         self.render_game_over_screen()
 
     def render_score_and_lives(self):
-        score_surface = self.base_pixel_font.render(
-            f"SCORE {self.player.score}",
-            (0, 0, 0, 0),
-            self.display_config[ConfigKey.TEXT_COLOR],
+        score_surface = self.text.field(
+            "score", "SCORE ", self.simulation.player.score, self.base_pixel_font
         )
-        hi_score_surface = self.base_pixel_font.render(
-            f" | HI-SCORE {self.high_score}",
-            (0, 0, 0, 0),
-            self.display_config[ConfigKey.TEXT_COLOR],
+        hi_score_surface = self.text.field(
+            "hi-score", " | HI-SCORE ", self.high_score, self.base_pixel_font
         )
-        lives_surface = self.base_pixel_font.render(
-            f"LIVES {self.player.lives}",
-            (0, 0, 0, 0),
-            self.display_config[ConfigKey.TEXT_COLOR],
+        lives_surface = self.text.field(
+            "lives", "LIVES ", self.simulation.player.lives, self.base_pixel_font
         )
-        self.screen.blit(score_surface, (0, 0))
-        self.screen.blit(hi_score_surface, (score_surface.get_width(), 0))
-        self.screen.blit(
+        self.canvas.blit(score_surface, (0, 0))
+        self.canvas.blit(hi_score_surface, (score_surface.get_width(), 0))
+        self.canvas.blit(
             lives_surface,
             (self.screen.get_width() - lives_surface.get_width(), 0),
         )
 
     def render_pause_screen(self):
         if self.is_pause:
-            pause_surface = self.base_pixel_font.render(
-                f"PAUSED", (0, 0, 0, 0), self.display_config[ConfigKey.TEXT_COLOR]
-            )
-            self.screen.blit(
+            pause_surface = self.text.label("PAUSED", self.base_pixel_font)
+            self.canvas.blit(
                 pause_surface,
                 (
                     (self.screen.get_width() - pause_surface.get_width()) / 2,
@@ -361,21 +483,19 @@ class Game:
             )
 
     def render_game_over_screen(self):
-        if self.is_game_over:
-            game_over_surface = self.large_pixel_font.render(
-                f"GAME OVER!", (0, 0, 0, 0), self.display_config[ConfigKey.TEXT_COLOR]
-            )
-            subtext_surface = self.base_pixel_font.render(
-                f"Press  ENTER  to  restart", (0, 0, 0, 0), self.display_config[ConfigKey.TEXT_COLOR]
+        if self.simulation.is_game_over:
+            game_over_surface = self.text.label("GAME OVER!", self.large_pixel_font)
+            subtext_surface = self.text.label(
+                "Press  ENTER  to  restart", self.base_pixel_font
             )
-            self.screen.blit(
+            self.canvas.blit(
                 game_over_surface,
                 (
                     (self.screen.get_width() - game_over_surface.get_width()) / 2,
                     self.screen.get_height() / 2 - game_over_surface.get_height(),
                 ),
             )
-            self.screen.blit(
+            self.canvas.blit(
                 subtext_surface,
                 (
                     (self.screen.get_width() - subtext_surface.get_width()) / 2,
@@ -384,11 +504,51 @@ class Game:
             )
 
     def restart(self):
-        self.high_score = self.player.score if self.player.score > self.high_score else self.high_score
-        self.init_player()
-        self.init_enemies()
-        self.init_barriers()
-        self.is_game_over = False
-
-game = Game()
-game.start()
+        score = self.simulation.player.score
+        self.high_score = score if score > self.high_score else self.high_score
+        # Applied with the next frame's inputs so recordings see it in order
+        self.restart_requested = True
+        self.delta_time = 0
+
+
+def parse_override(text: str) -> tuple[str, object]:
+    key, _, value = text.partition("=")
+    try:
+        # TOML literal syntax, so numbers and booleans keep their types
+        parsed = tomllib.loads(f"value = {value}")["value"]
+    except tomllib.TOMLDecodeError:
+        parsed = value
+    return key.strip(), parsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Space Invaders")
+    parser.add_argument("--config", help="TOML or JSON config file")
+    parser.add_argument("--profile", help="Profile from the config file's [profiles]")
+    parser.add_argument("--seed", type=int, help="Seed for the enemy formation")
+    parser.add_argument("--record", metavar="PATH", help="Save a replay on exit")
+    parser.add_argument("--replay", metavar="PATH", help="Watch a recorded replay")
+    parser.add_argument(
+        "--capture", metavar="PATH", help="Record every frame from the start"
+    )
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="SECTION.FIELD=VALUE",
+        help="Override a single config value, may be repeated",
+    )
+    args = parser.parse_args()
+
+    game = Game(
+        load_config(
+            args.config,
+            profile=args.profile,
+            overrides=dict(parse_override(text) for text in args.set),
+        ),
+        seed=args.seed,
+        record_path=args.record,
+        replay=Replay.load(args.replay) if args.replay else None,
+        capture_path=args.capture,
+    )
+    game.start()
@@ -1,82 +1,109 @@
 import pygame
-from bullet import Bullet
-from config import Config, ConfigKey
+from audio import AudioManager, NullAudioBackend
+from bullet import BulletPool, BulletSource
+from sprite_manager import SpriteManager, SpriteKey
+from config import Config, SoundKey, default_config
 
 
 class Player(pygame.sprite.Sprite):
     def __init__(
         self,
-        sprites: list[pygame.Surface],
+        sprite_manager: SpriteManager,
         position: tuple[int, int] = None,
         speed: float | None = None,
         size: tuple[int, int] | None = None,
         lives: float | None = None,
+        audio: AudioManager | None = None,
+        config: Config | None = None,
     ):
         pygame.sprite.Sprite.__init__(self)
 
-        config = Config()
-        player_config = config.player_config()
+        if config is None:
+            config = default_config()
+        player_config = config.player
 
         self.position = position if position is not None else pygame.Vector2(0, 0)
-        self.speed = (
-            speed if speed is not None else player_config[ConfigKey.PLAYER_SPEED]
-        )
+        self.speed = speed if speed is not None else player_config.speed
         self.size = (
-            size
-            if size is not None
-            else (
-                player_config[ConfigKey.PLAYER_SIZE_WIDTH],
-                player_config[ConfigKey.PLAYER_SIZE_HEIGHT],
-            )
-        )
-        self.lives = (
-            lives if lives is not None else player_config[ConfigKey.PLAYER_LIVES]
+            size if size is not None else (player_config.width, player_config.height)
         )
+        self.lives = lives if lives is not None else player_config.lives
+        self.start_lives = self.lives
 
-        self.bullets: list[Bullet] = []
+        # One bullet at a time
+        self.bullets = BulletPool(
+            capacity=1,
+            sprite_manager=sprite_manager,
+            sprite_keys={BulletSource.PLAYER: SpriteKey.PLAYER_BULLET},
+            config=config,
+        )
         self.score = 0
-        self.death_timer_ms = player_config[ConfigKey.PLAYER_DEATH_TIMER_MS]
+        self.death_timer_ms = player_config.death_timer_ms
         self.is_dead = False
 
-        self.sprites = [pygame.transform.scale(sprite, self.size) for sprite in sprites]
+        self.sprites = sprite_manager.get_scaled(SpriteKey.PLAYER, self.size).surfaces
         self.max_sprites_index = len(self.sprites) - 1
         self.curr_sprite_index = 0
         self.death_sprite = self.sprites[1]
         self.rect = self.sprites[self.curr_sprite_index].get_rect()
-        self.rect.x = position.x
-        self.rect.y = position.y
+        self.rect.x = self.position.x
+        self.rect.y = self.position.y
+        # Exact position, the rect only holds it rounded to whole pixels
+        self.x = float(self.position.x)
+        # Position at the start of the tick, rendering interpolates from it
+        self.previous_x = self.x
 
-        sound_config = config.sound_config()
-        self.shoot_sound = pygame.mixer.Sound(
-            sound_config[ConfigKey.PLAYER_SHOOT_SOUND]
-        )
-        self.death_sound = pygame.mixer.Sound(
-            sound_config[ConfigKey.PLAYER_DEATH_SOUND]
+        self.audio = (
+            audio if audio is not None else AudioManager(NullAudioBackend(), config)
         )
 
+    def reset(self):
+        """Restore the player to the start of a new game, reusing its pool and sprites."""
+        self.set_x(self.position.x)
+        self.previous_x = self.x
+        self.rect.y = self.position.y
+        self.lives = self.start_lives
+        self.score = 0
+        self.is_dead = False
+        self.curr_sprite_index = 0
+        self.bullets.clear()
+
+    def set_x(self, x: float):
+        self.x = float(x)
+        self.rect.x = x
+
+    def store_previous(self):
+        self.previous_x = self.x
+
     def move_left(self, delta_time: float, left_limit: float):
-        self.rect.x = max(self.rect.x - self.speed * delta_time, left_limit)
+        self.set_x(max(self.x - self.speed * delta_time, left_limit))
 
     def move_right(self, delta_time: float, right_limit: float):
-        self.rect.x = min(self.rect.x + self.speed * delta_time, right_limit)
+        self.set_x(min(self.x + self.speed * delta_time, right_limit))
 
-    def shoot(self, bullet: Bullet):
+    def shoot(self, speed: float):
         # One bullet at a time
         if len(self.bullets) > 0:
             return
-        pygame.mixer.Sound.play(self.shoot_sound)
-        self.bullets.append(bullet)
+        self.audio.play(SoundKey.PLAYER_SHOOT_SOUND)
+        bullet_pos = pygame.Vector2(
+            x=self.x + self.size[0] / 2,
+            y=self.rect.y,
+        )
+        self.bullets.spawn(bullet_pos, -speed, BulletSource.PLAYER)
 
     def lose_life(self):
         self.lives -= 1
         self.is_dead = True
-        pygame.mixer.Sound.play(self.death_sound)
+        self.audio.play(SoundKey.PLAYER_DEATH_SOUND)
 
     def revive(self):
         self.is_dead = False
 
-    def render(self, surface: pygame.Surface):
+    def render(self, surface: pygame.Surface, alpha: float = 1.0):
+        """Draw alpha of the way from the previous tick's position to this one's."""
+        x = self.previous_x + (self.x - self.previous_x) * alpha
         surface.blit(
             self.death_sprite if self.is_dead else self.sprites[self.curr_sprite_index],
-            self.rect,
+            (round(x), self.rect.y),
         )
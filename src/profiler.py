@@ -0,0 +1,136 @@
+import cProfile
+import io
+import numpy as np
+import pstats
+import pygame
+import time
+
+
+class FrameProfiler:
+    """
+    Opt-in per-phase frame timings.
+
+    `instrument` swaps a method on one object for a timed wrapper, so nothing
+    is measured, or slowed down, until the profiler is switched on. Timings
+    of the last `capacity` frames are kept in a ring buffer.
+    """
+
+    def __init__(self, capacity: int = 600, refresh_frames: int = 30) -> None:
+        self.capacity = capacity
+        self.refresh_frames = refresh_frames
+        self.phases: list[str] = []
+        self.timings = np.zeros((0, capacity))
+        self.frame_times = np.zeros(capacity)
+        self.frames = 0
+        self.slot = 0
+        self.frame_start: float | None = None
+        self.wrapped: list[tuple[object, str]] = []
+
+        self.overlay: list[tuple[pygame.Surface, tuple[int, int]]] = []
+        self.capture: cProfile.Profile | None = None
+        self.capture_remaining = 0
+        self.capture_path = ""
+
+    def instrument(self, label: str, target: object, method_name: str):
+        """Time every call of target.method_name under label."""
+        index = len(self.phases)
+        self.phases.append(label)
+        self.timings = np.vstack([self.timings, np.zeros(self.capacity)])
+        original = getattr(target, method_name)
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.timings[index, self.slot] += perf_counter() - start
+
+        setattr(target, method_name, timed)
+        self.wrapped.append((target, method_name))
+
+    def uninstrument(self):
+        # The wrappers shadow class methods on the instance, deleting them unshadows
+        for target, method_name in self.wrapped:
+            delattr(target, method_name)
+        self.wrapped.clear()
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frame_times[self.slot] = now - self.frame_start
+            self.frames += 1
+            self.slot = self.frames % self.capacity
+            self.timings[:, self.slot] = 0
+        self.frame_start = now
+
+        if self.capture is not None:
+            self.capture_remaining -= 1
+            if self.capture_remaining <= 0:
+                self.finish_capture()
+
+    def percentiles(self) -> list[tuple[str, float, float, float]]:
+        """(label, p50, p95, p99) in milliseconds over the buffered frames."""
+        count = min(self.frames, self.capacity)
+        if count == 0:
+            return []
+        # Only completed frames, the current slot is still being filled
+        slots = [
+            slot for slot in range(min(count + 1, self.capacity)) if slot != self.slot
+        ]
+        rows = np.vstack([self.timings[:, slots], self.frame_times[slots]])
+        values = np.percentile(rows, [50, 95, 99], axis=1) * 1000
+        labels = self.phases + ["frame"]
+        return [
+            (label, values[0, index], values[1, index], values[2, index])
+            for index, label in enumerate(labels)
+        ]
+
+    def start_capture(self, frames: int, path: str):
+        """Run cProfile over the next frames and dump the stats to path."""
+        if self.capture is not None:
+            return
+        self.capture = cProfile.Profile()
+        self.capture_remaining = frames
+        self.capture_path = path
+        self.capture.enable()
+
+    def finish_capture(self):
+        self.capture.disable()
+        self.capture.dump_stats(self.capture_path)
+        summary = io.StringIO()
+        stats = pstats.Stats(self.capture, stream=summary)
+        stats.sort_stats("cumulative").print_stats(15)
+        print(f"Profile written to {self.capture_path}")
+        print(summary.getvalue())
+        self.capture = None
+
+    def render_overlay(
+        self,
+        surface: pygame.Surface,
+        font: pygame.font.Font,
+        color,
+        counts: dict[str, int],
+        position: tuple[int, int],
+        column_widths: tuple[int, ...] = (180, 55, 55, 55),
+    ):
+        # Re-rendering text every frame would show up in the numbers it reports
+        if self.frames % self.refresh_frames == 0 or not self.overlay:
+            rows = [("phase", "p50", "p95", "p99 ms")]
+            rows += [
+                (label, f"{p50:.2f}", f"{p95:.2f}", f"{p99:.2f}")
+                for label, p50, p95, p99 in self.percentiles()
+            ]
+            rows.append(("  ".join(f"{name} {count}" for name, count in counts.items()),))
+            self.overlay = []
+            y = 0
+            for row in rows:
+                x = 0
+                for cell, width in zip(row, column_widths):
+                    text = font.render(cell, True, color)
+                    self.overlay.append((text, (x, y)))
+                    x += width
+                y += font.get_linesize()
+
+        for text, (x, y) in self.overlay:
+            surface.blit(text, (position[0] + x, position[1] + y))
@@ -0,0 +1,105 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    Opt-in renderer that only repaints what changed between frames.
+
+    Game objects blit onto it as if it were the screen. On `present` the draw
+    list is compared with the previous frame's, the rects of anything that
+    appeared, moved, changed image or vanished are cleared to the background,
+    everything overlapping them is redrawn clipped to those rects, and only
+    those rects are pushed with pygame.display.update.
+    """
+
+    def __init__(self, screen: pygame.Surface, background) -> None:
+        self.screen = screen
+        self.background = background
+        self.items: list[tuple[pygame.Surface, pygame.Rect, pygame.Rect | None, int]] = []
+        # Holding on to the previous images keeps their ids from being reused
+        self.previous_items: list[
+            tuple[pygame.Surface, pygame.Rect, pygame.Rect | None, int]
+        ] = []
+        self.marked: list[pygame.Rect] = []
+        self.needs_full_redraw = True
+
+    def get_width(self) -> int:
+        return self.screen.get_width()
+
+    def get_height(self) -> int:
+        return self.screen.get_height()
+
+    def get_size(self) -> tuple[int, int]:
+        return self.screen.get_size()
+
+    def get_rect(self, **kwargs) -> pygame.Rect:
+        return self.screen.get_rect(**kwargs)
+
+    def blit(self, source: pygame.Surface, dest, area=None, special_flags=0) -> pygame.Rect:
+        size = pygame.Rect(area).size if area is not None else source.get_size()
+        if isinstance(dest, pygame.Rect):
+            rect = pygame.Rect(dest.topleft, size)
+        else:
+            rect = pygame.Rect(dest, size)
+        self.items.append(
+            (source, rect, pygame.Rect(area) if area is not None else None, special_flags)
+        )
+        return rect
+
+    def mark_dirty(self, rect: pygame.Rect):
+        """Repaint rect even if nothing moved, e.g. when an image was drawn on."""
+        self.marked.append(pygame.Rect(rect))
+
+    def invalidate(self):
+        self.needs_full_redraw = True
+
+    def present(self) -> list[pygame.Rect]:
+        if self.needs_full_redraw:
+            dirty = [self.screen.get_rect()]
+            self.needs_full_redraw = False
+        else:
+            dirty = self.find_dirty_rects()
+
+        self.repaint(dirty)
+        pygame.display.update(dirty)
+
+        self.previous_items = self.items
+        self.items = []
+        self.marked = []
+        return dirty
+
+    def find_dirty_rects(self) -> list[pygame.Rect]:
+        previous = {self.item_key(item): item[1] for item in self.previous_items}
+        current = {self.item_key(item): item[1] for item in self.items}
+        dirty = [rect for key, rect in previous.items() if key not in current]
+        dirty += [rect for key, rect in current.items() if key not in previous]
+        dirty += self.marked
+
+        screen_rect = self.screen.get_rect()
+        return [rect.clip(screen_rect) for rect in dirty if rect.colliderect(screen_rect)]
+
+    def repaint(self, dirty: list[pygame.Rect]):
+        rects = [item[1] for item in self.items]
+        for rect in dirty:
+            # Clear and redraw each rect on its own so overlapping dirty rects
+            # never blend translucent images twice, and clip so redrawing
+            # keeps the original draw order
+            self.screen.set_clip(rect)
+            self.screen.fill(self.background, rect)
+            for index in rect.collidelistall(rects):
+                source, item_rect, area, special_flags = self.items[index]
+                self.screen.blit(source, item_rect, area, special_flags)
+        self.screen.set_clip(None)
+
+    @staticmethod
+    def item_key(item) -> tuple:
+        source, rect, area, special_flags = item
+        return (
+            id(source),
+            rect.x,
+            rect.y,
+            rect.width,
+            rect.height,
+            tuple(area) if area is not None else None,
+            special_flags,
+        )
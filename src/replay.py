@@ -0,0 +1,205 @@
+import argparse
+import dataclasses
+import json
+import struct
+import time
+import zlib
+from enum import IntFlag
+from config import Config
+from simulation import Simulation, SimulationInput
+from sprite_manager import SpriteManager
+from audio import AudioManager
+import snapshot
+
+MAGIC = b"SIRP"
+VERSION = 2
+
+HEADER = struct.Struct("<4sBQI")
+# Input flags and the tick's delta time in whole microseconds, exact for both
+# clock ticks (whole milliseconds) and fixed steps
+FRAME = struct.Struct("<BI")
+KEYFRAME = struct.Struct("<II")
+
+
+class InputFlag(IntFlag):
+    LEFT = 1
+    RIGHT = 2
+    FIRE = 4
+    PAUSE = 8
+    RESTART = 16
+
+
+class Replay:
+    """
+    A recorded session: seed, config, one packed input record per frame and
+    state keyframes every `keyframe_interval` frames for seeking.
+    """
+
+    def __init__(self, seed: int, config: Config, keyframe_interval: int = 600) -> None:
+        self.seed = seed
+        self.config = config
+        self.keyframe_interval = keyframe_interval
+        self.frames = bytearray()
+        # Frame index -> snapshot taken before that frame was applied
+        self.keyframes: dict[int, bytes] = {}
+
+    def __len__(self):
+        return len(self.frames) // FRAME.size
+
+    def frame(self, index: int) -> tuple[InputFlag, int]:
+        flags, delta_us = FRAME.unpack_from(self.frames, index * FRAME.size)
+        return InputFlag(flags), delta_us
+
+    def save(self, path: str):
+        config = json.dumps(dataclasses.asdict(self.config)).encode()
+        body = [
+            struct.pack("<I", len(config)),
+            config,
+            struct.pack("<I", len(self)),
+            bytes(self.frames),
+            struct.pack("<I", len(self.keyframes)),
+        ]
+        for index, data in self.keyframes.items():
+            body.append(KEYFRAME.pack(index, len(data)))
+            body.append(data)
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.seed, self.keyframe_interval))
+            file.write(zlib.compress(b"".join(body)))
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, seed, keyframe_interval = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a replay of this version")
+        body = memoryview(zlib.decompress(data[HEADER.size :]))
+
+        offset = 0
+
+        def take(size: int) -> bytes:
+            nonlocal offset
+            chunk = bytes(body[offset : offset + size])
+            offset += size
+            return chunk
+
+        (config_length,) = struct.unpack("<I", take(4))
+        config = Config().with_overrides(json.loads(take(config_length)))
+        replay = cls(seed, config, keyframe_interval)
+        (frame_count,) = struct.unpack("<I", take(4))
+        replay.frames = bytearray(take(frame_count * FRAME.size))
+        (keyframe_count,) = struct.unpack("<I", take(4))
+        for _ in range(keyframe_count):
+            index, length = KEYFRAME.unpack(take(KEYFRAME.size))
+            replay.keyframes[index] = take(length)
+        return replay
+
+
+def headless_tick_us(config: Config) -> int:
+    """Tick length for runs without a clock, the display rate if ticks aren't fixed."""
+    return round(1_000_000 / (config.gameplay.tick_rate or config.display.fps))
+
+
+def apply_frame(simulation: Simulation, flags: InputFlag, delta_us: int):
+    """Advance a simulation by one recorded frame, the same way Game does."""
+    if flags & InputFlag.RESTART:
+        simulation.restart()
+    if flags & InputFlag.PAUSE:
+        return
+    simulation.step(
+        delta_us / 1_000_000,
+        SimulationInput(
+            left=bool(flags & InputFlag.LEFT),
+            right=bool(flags & InputFlag.RIGHT),
+            fire=bool(flags & InputFlag.FIRE),
+        ),
+    )
+
+
+class ReplayRecorder:
+    def __init__(self, simulation: Simulation, replay: Replay) -> None:
+        self.simulation = simulation
+        self.replay = replay
+
+    def record(self, flags: InputFlag, delta_us: int):
+        """Log a frame, call before the frame is applied to the simulation."""
+        index = len(self.replay)
+        if index % self.replay.keyframe_interval == 0:
+            self.replay.keyframes[index] = snapshot.capture(self.simulation)
+        self.replay.frames += FRAME.pack(flags, delta_us)
+
+
+class ReplayPlayer:
+    """Re-runs a replay on a fresh simulation, frame by frame or as fast as possible."""
+
+    def __init__(
+        self,
+        replay: Replay,
+        sprite_manager: SpriteManager,
+        audio: AudioManager | None = None,
+    ) -> None:
+        self.replay = replay
+        self.simulation = Simulation(
+            sprite_manager=sprite_manager,
+            config=replay.config,
+            seed=replay.seed,
+            audio=audio,
+        )
+        self.position = 0
+
+    def is_finished(self) -> bool:
+        return self.position >= len(self.replay)
+
+    def step(self) -> InputFlag:
+        flags, delta_us = self.replay.frame(self.position)
+        apply_frame(self.simulation, flags, delta_us)
+        self.position += 1
+        return flags
+
+    def seek(self, position: int):
+        """Jump to just before `position`, starting from the nearest keyframe."""
+        position = min(max(position, 0), len(self.replay))
+        keyframe = max(
+            (index for index in self.replay.keyframes if index <= position),
+            default=None,
+        )
+        if keyframe is not None and not keyframe <= self.position <= position:
+            snapshot.restore(self.simulation, self.replay.keyframes[keyframe])
+            self.position = keyframe
+        elif self.position > position:
+            raise ValueError("Cannot seek backwards without a keyframe")
+        while self.position < position:
+            self.step()
+
+    def run(self) -> Simulation:
+        """Play the rest of the replay headless and uncapped."""
+        while not self.is_finished():
+            self.step()
+        return self.simulation
+
+
+if __name__ == "__main__":
+    import pygame
+
+    parser = argparse.ArgumentParser(description="Re-run a replay headless")
+    parser.add_argument("replay", help="Replay file recorded with main.py --record")
+    parser.add_argument("--seek", type=int, help="Stop at this frame instead")
+    args = parser.parse_args()
+
+    pygame.init()
+    replay = Replay.load(args.replay)
+    player = ReplayPlayer(replay, SpriteManager(replay.config.asset.spritesheet_path))
+    start = time.perf_counter()
+    if args.seek is not None:
+        player.seek(args.seek)
+    else:
+        player.run()
+    elapsed = time.perf_counter() - start
+
+    simulation = player.simulation
+    print(
+        f"frame {player.position}/{len(replay)} tick {simulation.tick} "
+        f"score {simulation.player.score} lives {simulation.player.lives} "
+        f"wave {simulation.enemy_formation.wave_count} "
+        f"game over {simulation.is_game_over} in {elapsed:.3f}s"
+    )
@@ -0,0 +1,81 @@
+import heapq
+from typing import Callable
+
+
+# Absorbs float error from summing frame times, so a 2000 ms timer advanced
+# by 1/60 s steps fires on the 120th step whatever the start time was
+EPSILON_MS = 1e-6
+
+
+class Scheduler:
+    """
+    Timers in simulated milliseconds, advanced by the owner's clock.
+
+    Pending timers sit in a heap ordered by due time then creation order, so
+    a tick with nothing due only peeks at the top and ties fire in the order
+    they were scheduled. Cancelled timers are dropped lazily when they reach
+    the top.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        # (due, sequence, timer id), the sequence breaks ties deterministically
+        self.queue: list[tuple[float, int, int]] = []
+        # Timer id -> (callback, repeat interval or None)
+        self.timers: dict[int, tuple[Callable[[], None], float | None]] = {}
+        self.sequence = 0
+        self.next_id = 1
+
+    def __len__(self):
+        return len(self.timers)
+
+    def schedule(
+        self,
+        delay_ms: float,
+        callback: Callable[[], None],
+        repeat_ms: float | None = None,
+    ) -> int:
+        """Run callback after delay_ms, then every repeat_ms if given."""
+        if repeat_ms is not None and repeat_ms <= 0:
+            raise ValueError("Repeating timers need a positive interval")
+        timer_id = self.next_id
+        self.next_id += 1
+        self.timers[timer_id] = (callback, repeat_ms)
+        self.push(self.now + delay_ms, timer_id)
+        return timer_id
+
+    def cancel(self, timer_id: int) -> bool:
+        if self.timers.pop(timer_id, None) is None:
+            return False
+        # Stale entries are skipped when popped, but do not let them pile up
+        if len(self.queue) > 2 * len(self.timers) + 16:
+            self.queue = [entry for entry in self.queue if entry[2] in self.timers]
+            heapq.heapify(self.queue)
+        return True
+
+    def is_scheduled(self, timer_id: int) -> bool:
+        return timer_id in self.timers
+
+    def clear(self):
+        self.queue.clear()
+        self.timers.clear()
+
+    def advance(self, delta_ms: float):
+        self.now += delta_ms
+        queue = self.queue
+        while queue and queue[0][0] <= self.now + EPSILON_MS:
+            due, _, timer_id = heapq.heappop(queue)
+            timer = self.timers.get(timer_id)
+            if timer is None:
+                continue
+            callback, repeat_ms = timer
+            if repeat_ms is None:
+                del self.timers[timer_id]
+            else:
+                # Measured from the due time so repeats do not drift
+                self.push(due + repeat_ms, timer_id)
+            callback()
+
+    def push(self, due: float, timer_id: int):
+        heapq.heappush(self.queue, (due, self.sequence, timer_id))
+        self.sequence += 1
@@ -0,0 +1,245 @@
+import pygame
+import random
+from typing import NamedTuple
+from audio import AudioManager, NullAudioBackend
+from player import Player
+from enemy import *
+from swarm import SwarmFormation
+from barrier import Barrier, BarrierBand
+from sprite_manager import SpriteManager, SpriteKey
+from config import Config, default_config
+from scheduler import Scheduler
+
+FORMATION_LAYOUTS = {"classic": EnemyFormation, "swarm": SwarmFormation}
+
+
+class SimulationInput(NamedTuple):
+    left: bool = False
+    right: bool = False
+    fire: bool = False
+
+
+class Simulation:
+    """Game rules without display, blits or clock, advanced with `step`."""
+
+    def __init__(
+        self,
+        sprite_manager: SpriteManager,
+        config: Config | None = None,
+        seed: int | None = None,
+        audio: AudioManager | None = None,
+    ) -> None:
+        if config is None:
+            config = default_config()
+        self.audio = (
+            audio if audio is not None else AudioManager(NullAudioBackend(), config)
+        )
+        self.gameplay_config = config.gameplay
+        self.barrier_config = config.barrier
+        self.enemy_config = config.enemy_formation
+        self.config = config
+
+        self.width = config.display.screen_width
+        self.height = config.display.screen_height
+        self.sprite_manager = sprite_manager
+        self.rng = random.Random(seed)
+
+        self.delta_time = 0
+        self.tick = 0
+        # Revive and respawn run on simulated time, never the wall clock
+        self.scheduler = Scheduler()
+        self.is_game_over = False
+        self.init_player()
+        self.init_enemies()
+        self.init_barriers()
+
+    def restart(self):
+        self.player.reset()
+        self.enemy_formation.reset()
+        for barrier in self.barriers:
+            barrier.reset()
+        self.scheduler.clear()
+        self.is_game_over = False
+
+    def reset(self, seed: int | None = None):
+        """A new episode on the existing objects, played as if built with seed."""
+        # The formation draws from the same generator, so this reseeds it too
+        self.rng.seed(seed)
+        self.restart()
+        self.tick = 0
+        self.delta_time = 0
+
+    def init_player(self):
+        player_start_pos = pygame.Vector2(
+            self.width / 2,
+            self.height - self.gameplay_config.player_start_y_offset,
+        )
+        self.playable_area_offset = self.gameplay_config.playable_area_offset
+        self.player = Player(
+            sprite_manager=self.sprite_manager,
+            position=player_start_pos,
+            audio=self.audio,
+            config=self.config,
+        )
+
+    def init_enemies(self):
+        layout = self.enemy_config.layout
+        if layout not in FORMATION_LAYOUTS:
+            raise ValueError(f"Unknown enemy formation layout {layout!r}")
+        self.enemy_formation = FORMATION_LAYOUTS[layout](
+            left_limit=self.enemy_config.enemy_width,
+            right_limit=self.width - self.enemy_config.enemy_width,
+            sprite_manager=self.sprite_manager,
+            config=self.config,
+            enemy_start_pos=pygame.Vector2(5, self.height / 3),
+            rng=self.rng,
+            audio=self.audio,
+        )
+
+    def init_barriers(self):
+        # Calculate barriers start x to space them evenly
+        # Using player position and double barrier height for y
+        barrier_count = self.barrier_config.count
+        barrier_width = self.barrier_config.width
+        barrier_spacing = (self.width - (barrier_count * barrier_width)) / (
+            barrier_count + 1
+        )
+        self.barriers = [
+            Barrier(
+                sprite_manager=self.sprite_manager,
+                position=(
+                    barrier_spacing + i * (barrier_width + barrier_spacing),
+                    self.height
+                    - self.gameplay_config.player_start_y_offset
+                    - self.barrier_config.height * 2,
+                ),
+                config=self.config,
+            )
+            for i in range(0, barrier_count)
+        ]
+        self.barrier_band = BarrierBand(self.barriers)
+
+    def step(self, delta_time: float, inputs: SimulationInput):
+        self.tick += 1
+        self.player.store_previous()
+        self.player.bullets.store_previous()
+        self.enemy_formation.bullets.store_previous()
+        self.scheduler.advance(delta_time * 1000)
+        self.update(delta_time, inputs)
+        # Sounds requested during the tick are played once each
+        self.audio.flush()
+
+    def update(self, delta_time: float, inputs: SimulationInput):
+        if self.is_game_over:
+            return
+        if inputs.fire:
+            self.player_shoot()
+        if self.player.is_dead:
+            return
+
+        self.delta_time = delta_time
+        self.update_bullets()
+        self.update_player(inputs)
+        self.update_enemies()
+        self.update_player_collisions()
+
+    def revive_player(self):
+        self.player.revive()
+
+    def respawn_enemies(self):
+        self.enemy_formation.reset_wave()
+        self.enemy_formation.resume_moving()
+
+    def player_shoot(self):
+        self.player.shoot(speed=self.gameplay_config.player_bullet_speed)
+
+    def update_bullets(self):
+        self.update_player_bullets()
+        self.update_enemy_bullets()
+
+    def update_player_bullets(self):
+        bullets = self.player.bullets
+        bullets.move(self.delta_time)
+        # Out of bound
+        bullets.cull(0, self.height)
+
+        for index in bullets.indices():
+            bullet_rect = bullets.rect_at(index)
+            is_hit = False
+            # Enemy collision
+            hit_cell = self.enemy_formation.hit_test(bullet_rect)
+            if hit_cell is not None:
+                self.kill_enemy(*hit_cell)
+                is_hit = True
+            # Barrier collision
+            if self.hit_barriers(bullet_rect, bullets.mask_at(index)):
+                is_hit = True
+
+            if is_hit:
+                bullets.despawn(index)
+
+    def kill_enemy(self, col: int, row: int):
+        formation = self.enemy_formation
+        self.player.score += formation.kill(col, row)
+        if formation.enemy_count == 0:
+            formation.despawn_bullets()
+            formation.stop_moving()
+            self.scheduler.schedule(formation.respawn_timer, self.respawn_enemies)
+
+    def update_enemy_bullets(self):
+        bullets = self.enemy_formation.bullets
+        bullets.move(self.delta_time)
+        # Out of bound
+        bullets.cull(0, self.height)
+
+        for index in bullets.indices():
+            bullet_rect = bullets.rect_at(index)
+            is_hit = False
+            # Player collision
+            if bullet_rect.colliderect(self.player):
+                self.handle_player_hit()
+                is_hit = True
+            # Barrier collision
+            if self.hit_barriers(bullet_rect, bullets.mask_at(index)):
+                is_hit = True
+
+            if is_hit:
+                bullets.despawn(index)
+
+    def hit_barriers(self, bullet_rect: pygame.Rect, bullet_mask: pygame.mask.Mask):
+        is_hit = False
+        for barrier, collide_point in self.barrier_band.overlaps(bullet_rect, bullet_mask):
+            barrier.handle_damage(collide_point=collide_point)
+            is_hit = True
+        return is_hit
+
+    def update_player(self, inputs: SimulationInput):
+        if inputs.left:
+            self.player.move_left(
+                delta_time=self.delta_time, left_limit=self.playable_area_offset
+            )
+        if inputs.right:
+            self.player.move_right(
+                self.delta_time,
+                right_limit=self.width - self.playable_area_offset - self.player.size[0],
+            )
+
+    def update_enemies(self):
+        self.enemy_formation.auto_move(delta_time=self.delta_time, mode="step")
+        self.enemy_formation.auto_shoot(
+            delta_time=self.delta_time,
+            speed=self.gameplay_config.enemy_bullet_speed,
+        )
+
+    def update_player_collisions(self):
+        if self.enemy_formation.collide_player(self.player):
+            self.player.lose_life()
+            if self.player.lives <= 0:
+                self.is_game_over = True
+
+    def handle_player_hit(self):
+        self.player.lose_life()
+        if self.player.lives <= 0:
+            self.is_game_over = True
+        else:
+            self.scheduler.schedule(self.player.death_timer_ms, self.revive_player)
@@ -0,0 +1,361 @@
+import dataclasses
+import heapq
+import json
+import numpy as np
+import pygame
+import struct
+import weakref
+import zlib
+from collections import deque
+from barrier import Barrier
+from bullet import BulletPool
+from simulation import Simulation
+
+MAGIC = b"SNAP"
+VERSION = 3
+
+HEADER = struct.Struct("<4sB")
+SIMULATION = struct.Struct("<QBd")
+RNG = struct.Struct("<iBd")
+SCHEDULER = struct.Struct("<dQQI")
+TIMER = struct.Struct("<dQQdB")
+PLAYER = struct.Struct("<diiqBB")
+POOL = struct.Struct("<II")
+FORMATION = struct.Struct("<bBBdIIdB")
+BARRIER = struct.Struct("<H")
+DELTA = struct.Struct("<I")
+FILE_MAGIC = b"SISV"
+# magic, config fingerprint
+FILE_HEADER = struct.Struct("<4sI")
+
+# Packed barrier bitmaps by barrier, reused until the barrier's mask changes
+bits_cache: "weakref.WeakKeyDictionary[Barrier, tuple[int, bytes]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class SnapshotWriter:
+    def __init__(self) -> None:
+        self.parts: list[bytes] = []
+
+    def pack(self, layout: struct.Struct, *values):
+        self.parts.append(layout.pack(*values))
+
+    def array(self, values: np.ndarray):
+        self.parts.append(np.ascontiguousarray(values).tobytes())
+
+    def raw(self, data: bytes):
+        self.parts.append(data)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.parts)
+
+
+class SnapshotReader:
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        values = layout.unpack_from(self.data, self.offset)
+        self.offset += layout.size
+        return values
+
+    def array(self, dtype, count: int) -> np.ndarray:
+        values = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset += values.nbytes
+        return values
+
+    def raw(self, size: int) -> bytes:
+        data = bytes(self.data[self.offset : self.offset + size])
+        self.offset += size
+        return data
+
+
+def mask_to_bits(mask: pygame.mask.Mask) -> bytes:
+    surface = mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 0))
+    return np.packbits(pygame.surfarray.pixels_alpha(surface).T.ravel() > 0).tobytes()
+
+
+def bits_to_mask(data: bytes, size: tuple[int, int]) -> pygame.mask.Mask:
+    width, height = size
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))[: width * height]
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    pygame.surfarray.pixels_alpha(surface)[:] = bits.reshape(height, width).T * 255
+    return pygame.mask.from_surface(surface)
+
+
+def capture(simulation: Simulation) -> bytes:
+    """Pack the whole simulation state, without pickle, into bytes."""
+    writer = SnapshotWriter()
+    writer.pack(HEADER, MAGIC, VERSION)
+    writer.pack(
+        SIMULATION, simulation.tick, simulation.is_game_over, simulation.delta_time
+    )
+
+    version, internal, gauss_next = simulation.rng.getstate()
+    writer.pack(RNG, version, gauss_next is not None, gauss_next or 0.0)
+    writer.array(np.array(internal, dtype=np.uint32))
+
+    scheduler = simulation.scheduler
+    live = [entry for entry in scheduler.queue if entry[2] in scheduler.timers]
+    writer.pack(
+        SCHEDULER, scheduler.now, scheduler.sequence, scheduler.next_id, len(live)
+    )
+    for due, sequence, timer_id in live:
+        callback, repeat_ms = scheduler.timers[timer_id]
+        # Timers only ever call simulation methods, so store them by name
+        name = callback.__name__.encode()
+        writer.pack(
+            TIMER,
+            due,
+            sequence,
+            timer_id,
+            repeat_ms if repeat_ms is not None else -1.0,
+            len(name),
+        )
+        writer.raw(name)
+
+    player = simulation.player
+    writer.pack(
+        PLAYER,
+        player.x,
+        player.rect.y,
+        player.lives,
+        player.score,
+        player.is_dead,
+        player.curr_sprite_index,
+    )
+    capture_pool(writer, player.bullets)
+
+    formation = simulation.enemy_formation
+    writer.pack(
+        FORMATION,
+        formation.horizontal_direction,
+        formation.can_move_down,
+        formation.can_move,
+        formation.current_step,
+        formation.wave_count,
+        formation.enemy_count,
+        formation.enemy_firing_cooldown,
+        formation.move_sound_index,
+    )
+    writer.array(formation.alive)
+    # Animation frames advance while rendering, so they are not simulation state
+    writer.array(formation.positions())
+    capture_pool(writer, formation.bullets)
+
+    for barrier in simulation.barriers:
+        cached = bits_cache.get(barrier)
+        if cached is not None and cached[0] == barrier.revision:
+            bits = cached[1]
+        else:
+            bits = mask_to_bits(barrier.mask)
+            bits_cache[barrier] = (barrier.revision, bits)
+        writer.pack(BARRIER, len(bits))
+        writer.raw(bits)
+
+    return writer.getvalue()
+
+
+def capture_pool(writer: SnapshotWriter, pool: BulletPool):
+    writer.pack(POOL, pool.count, len(pool.free))
+    writer.array(pool.x)
+    writer.array(pool.y)
+    writer.array(pool.velocity)
+    writer.array(pool.source)
+    writer.array(pool.active)
+    writer.array(np.array(pool.free, dtype=np.int32))
+
+
+def restore(simulation: Simulation, data: bytes):
+    """Put a simulation built from the same config back into a captured state."""
+    reader = SnapshotReader(data)
+    magic, version = reader.unpack(HEADER)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a snapshot of this version")
+    simulation.tick, is_game_over, simulation.delta_time = reader.unpack(SIMULATION)
+    simulation.is_game_over = bool(is_game_over)
+
+    version, has_gauss, gauss_next = reader.unpack(RNG)
+    internal = tuple(reader.array(np.uint32, 625).tolist())
+    simulation.rng.setstate((version, internal, gauss_next if has_gauss else None))
+
+    scheduler = simulation.scheduler
+    scheduler.now, scheduler.sequence, scheduler.next_id, timer_count = reader.unpack(
+        SCHEDULER
+    )
+    scheduler.clear()
+    for _ in range(timer_count):
+        due, sequence, timer_id, repeat_ms, name_length = reader.unpack(TIMER)
+        callback = getattr(simulation, reader.raw(name_length).decode())
+        scheduler.timers[timer_id] = (callback, repeat_ms if repeat_ms >= 0 else None)
+        scheduler.queue.append((due, sequence, timer_id))
+    heapq.heapify(scheduler.queue)
+
+    player = simulation.player
+    x, y, player.lives, player.score, is_dead, player.curr_sprite_index = (
+        reader.unpack(PLAYER)
+    )
+    player.set_x(x)
+    player.previous_x = x
+    player.rect.y = y
+    player.is_dead = bool(is_dead)
+    restore_pool(reader, player.bullets)
+
+    formation = simulation.enemy_formation
+    (
+        formation.horizontal_direction,
+        can_move_down,
+        can_move,
+        formation.current_step,
+        formation.wave_count,
+        formation.enemy_count,
+        formation.enemy_firing_cooldown,
+        formation.move_sound_index,
+    ) = reader.unpack(FORMATION)
+    formation.can_move_down = bool(can_move_down)
+    formation.can_move = bool(can_move)
+    formation.set_alive(
+        reader.array(np.bool_, formation.alive.size).reshape(formation.alive.shape)
+    )
+    shape = formation.positions().shape
+    formation.set_positions(reader.array(np.int32, int(np.prod(shape))).reshape(shape))
+    restore_pool(reader, formation.bullets)
+
+    for barrier in simulation.barriers:
+        (length,) = reader.unpack(BARRIER)
+        bits = reader.raw(length)
+        cached = bits_cache.get(barrier)
+        if cached is not None and cached[0] == barrier.revision and cached[1] == bits:
+            continue
+        barrier.set_mask(bits_to_mask(bits, barrier.mask.get_size()))
+        bits_cache[barrier] = (barrier.revision, bits)
+
+
+def restore_pool(reader: SnapshotReader, pool: BulletPool):
+    pool.count, free_count = reader.unpack(POOL)
+    pool.x[:] = reader.array(np.float64, pool.capacity)
+    pool.y[:] = reader.array(np.float64, pool.capacity)
+    pool.previous_y[:] = pool.y
+    pool.velocity[:] = reader.array(np.float64, pool.capacity)
+    pool.source[:] = reader.array(np.int8, pool.capacity)
+    pool.active[:] = reader.array(np.bool_, pool.capacity)
+    pool.free = reader.array(np.int32, free_count).tolist()
+
+
+def encode_delta(base: bytes, data: bytes) -> bytes:
+    """XOR data against base and compress, unchanged bytes become zero runs."""
+    size = max(len(base), len(data))
+    xor = np.zeros(size, dtype=np.uint8)
+    xor[: len(data)] = np.frombuffer(data, dtype=np.uint8)
+    xor[: len(base)] ^= np.frombuffer(base, dtype=np.uint8)
+    return DELTA.pack(len(data)) + zlib.compress(xor.tobytes(), 1)
+
+
+def decode_delta(base: bytes, delta: bytes) -> bytes:
+    (length,) = DELTA.unpack_from(delta)
+    xor = np.frombuffer(zlib.decompress(delta[DELTA.size :]), dtype=np.uint8).copy()
+    xor[: len(base)] ^= np.frombuffer(base, dtype=np.uint8)
+    return xor[:length].tobytes()
+
+
+class SnapshotHistory:
+    """
+    Bounded ring of per-frame snapshots for rewinding.
+
+    Every `keyframe_interval`-th snapshot is stored whole and the ones in
+    between as compressed XOR deltas against it. Once over capacity the
+    oldest keyframe is dropped together with its deltas.
+    """
+
+    def __init__(self, capacity: int = 600, keyframe_interval: int = 60) -> None:
+        self.capacity = capacity
+        self.keyframe_interval = keyframe_interval
+        # Each group is a keyframe followed by the deltas against it
+        self.groups: deque[tuple[bytes, list[bytes]]] = deque()
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def push(self, data: bytes):
+        if not self.groups or len(self.groups[-1][1]) + 1 >= self.keyframe_interval:
+            self.groups.append((data, []))
+        else:
+            keyframe, deltas = self.groups[-1]
+            deltas.append(encode_delta(keyframe, data))
+        self.count += 1
+        while self.count > self.capacity and len(self.groups) > 1:
+            self.count -= 1 + len(self.groups.popleft()[1])
+
+    def capture(self, simulation: Simulation):
+        self.push(capture(simulation))
+
+    def latest(self) -> bytes | None:
+        if not self.groups:
+            return None
+        keyframe, deltas = self.groups[-1]
+        return decode_delta(keyframe, deltas[-1]) if deltas else keyframe
+
+    def pop(self) -> bytes | None:
+        """Remove and return the newest snapshot."""
+        data = self.latest()
+        if data is None:
+            return None
+        keyframe, deltas = self.groups[-1]
+        if deltas:
+            deltas.pop()
+        else:
+            self.groups.pop()
+        self.count -= 1
+        return data
+
+    def rewind(self, simulation: Simulation, frames: int = 1) -> bool:
+        """
+        Restore the state from `frames` captures before the newest one,
+        dropping everything newer. The oldest snapshot is never dropped.
+        """
+        frames = min(frames, self.count - 1)
+        if frames <= 0:
+            return False
+        for _ in range(frames):
+            self.pop()
+        restore(simulation, self.latest())
+        return True
+
+    def clear(self):
+        self.groups.clear()
+        self.count = 0
+
+
+def config_fingerprint(simulation: Simulation) -> int:
+    """Checksum of the config that shapes simulation state, not presentation."""
+    config = simulation.config
+    shaping = {
+        "screen": (config.display.screen_width, config.display.screen_height),
+        "gameplay": dataclasses.asdict(config.gameplay),
+        "player": dataclasses.asdict(config.player),
+        "enemy_formation": dataclasses.asdict(config.enemy_formation),
+        "barrier": dataclasses.asdict(config.barrier),
+    }
+    return zlib.crc32(json.dumps(shaping, sort_keys=True).encode())
+
+
+def save(path: str, simulation: Simulation):
+    with open(path, "wb") as file:
+        file.write(FILE_HEADER.pack(FILE_MAGIC, config_fingerprint(simulation)))
+        file.write(zlib.compress(capture(simulation)))
+
+
+def load(path: str, simulation: Simulation):
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < FILE_HEADER.size:
+        raise ValueError(f"{path} is not a saved game")
+    magic, fingerprint = FILE_HEADER.unpack_from(data)
+    if magic != FILE_MAGIC:
+        raise ValueError(f"{path} is not a saved game")
+    if fingerprint != config_fingerprint(simulation):
+        raise ValueError(f"{path} was saved with a different config")
+    restore(simulation, zlib.decompress(data[FILE_HEADER.size :]))
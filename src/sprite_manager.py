@@ -1,5 +1,7 @@
 import pygame
+from collections import OrderedDict
 from enum import Enum
+from typing import NamedTuple
 from utils.spritesheet import SpriteSheet
 
 
@@ -14,9 +16,23 @@ class SpriteKey(Enum):
     BARRIER_DAMAGED = "barrier-damaged"
 
 
+class ScaledSprites(NamedTuple):
+    surfaces: list[pygame.Surface]
+    masks: list[pygame.mask.Mask]
+
+
+# -1 takes the color key from the top left pixel, like SpriteSheet.image_at
+ColorKey = int | tuple[int, int, int]
+
+
 class SpriteManager:
-    def __init__(self, spritesheet_path) -> None:
-        self.spritesheet = SpriteSheet(spritesheet_path)
+    def __init__(
+        self,
+        spritesheet_path,
+        max_scaled_entries: int = 64,
+        spritesheet_image: pygame.Surface | None = None,
+    ) -> None:
+        self.spritesheet = SpriteSheet(spritesheet_path, image=spritesheet_image)
         self.sprite_cords: dict[SpriteKey, list[tuple[int, int, int, int]]] = {
             SpriteKey.PLAYER: [(1, 49, 16, 8), (19, 49, 16, 8)],
             SpriteKey.OCTOPUS_ENEMY: [(1, 1, 16, 8), (1, 11, 16, 8)],
@@ -28,12 +44,60 @@ class SpriteManager:
             SpriteKey.BARRIER_DAMAGED: [(58, 49, 8, 8)],
         }
 
+        self.sprites: dict[SpriteKey, list[pygame.Surface]] = {}
+        # Least recently used entries are evicted first
+        self.scaled: OrderedDict[
+            tuple[SpriteKey, tuple[int, int], ColorKey], ScaledSprites
+        ] = OrderedDict()
+        self.max_scaled_entries = max_scaled_entries
+        self.hits = 0
+        self.misses = 0
+
     def get_sprites(self, key: SpriteKey) -> list[pygame.Surface]:
+        """Unscaled sheet slices, shared between callers so do not draw on them."""
         if key not in self.sprite_cords:
             raise Exception(f"Sprite cords not found for key {key}")
 
-        cords = self.sprite_cords[key]
+        if key not in self.sprites:
+            cords = self.sprite_cords[key]
+            self.sprites[key] = self.spritesheet.images_at(cords, colorkey=int(-1))
+
+        return self.sprites[key]
+
+    def get_scaled(
+        self, key: SpriteKey, size: tuple[int, int], colorkey: ColorKey = -1
+    ) -> ScaledSprites:
+        """Scaled display-format sprites and their masks, shared between callers."""
+        size = (int(size[0]), int(size[1]))
+        cache_key = (key, size, colorkey)
+        entry = self.scaled.get(cache_key)
+        if entry is not None:
+            self.hits += 1
+            self.scaled.move_to_end(cache_key)
+            return entry
+
+        self.misses += 1
+        surfaces = []
+        for sprite in self.get_sprites(key):
+            if colorkey != -1:
+                sprite = sprite.copy()
+                sprite.set_colorkey(colorkey, pygame.RLEACCEL)
+            sprite = pygame.transform.scale(sprite, size)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+                sprite.set_colorkey(sprite.get_colorkey(), pygame.RLEACCEL)
+            surfaces.append(sprite)
+        entry = ScaledSprites(
+            surfaces=surfaces,
+            masks=[pygame.mask.from_surface(surface) for surface in surfaces],
+        )
 
-        images = self.spritesheet.images_at(cords, colorkey=int(-1))
+        self.scaled[cache_key] = entry
+        if len(self.scaled) > self.max_scaled_entries:
+            self.scaled.popitem(last=False)
+        return entry
 
-        return images
+    def clear_cache(self):
+        self.scaled.clear()
+        self.hits = 0
+        self.misses = 0
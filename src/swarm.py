@@ -0,0 +1,112 @@
+import numpy as np
+import pygame
+from enemy import EnemyFormation
+from sprite_manager import SpriteKey
+
+# Sprite and points for each fifth of the rows, bottom up, as the classic
+# five row formation has them
+ROW_BANDS = [
+    (SpriteKey.OCTOPUS_ENEMY, 10),
+    (SpriteKey.OCTOPUS_ENEMY, 10),
+    (SpriteKey.CRAB_ENEMY, 20),
+    (SpriteKey.CRAB_ENEMY, 20),
+    (SpriteKey.SQUID_ENEMY, 30),
+]
+
+
+class SwarmFormation(EnemyFormation):
+    """
+    Formation for stress levels with thousands of enemies.
+
+    There are no per-enemy objects: every cell's position is derived from
+    the origin, so moving the swarm is O(1), and the live cells are drawn
+    once into a cached layer per animation frame that is blitted whole.
+    Kills are erased from the layers cell by cell when next rendered.
+    """
+
+    def create_enemies_list(self):
+        bands = [
+            ROW_BANDS[row * len(ROW_BANDS) // self.enemy_row]
+            for row in range(self.enemy_row)
+        ]
+        self.row_sprites = [self.sprites[key] for key, _ in bands]
+        self.row_points = [point for _, point in bands]
+        self.start_origin = (int(self.enemy_start_pos.x), int(self.enemy_start_pos.y))
+        # Cell (0, 0), positions follow the same integer steps as enemy rects
+        self.anchor = pygame.Rect(self.start_origin, self.enemy_size)
+
+        lattice = self.lattice
+        self.layer_size = (
+            int(self.enemy_col * lattice.step_x - self.enemy_formation_gap),
+            int(self.enemy_row * lattice.step_y - self.enemy_formation_gap),
+        )
+        frame_count = len(self.sprites[SpriteKey.OCTOPUS_ENEMY])
+        self.layers = [
+            pygame.Surface(self.layer_size, pygame.SRCALPHA) for _ in range(frame_count)
+        ]
+        # Cells currently drawn on the layers, compared with alive on render
+        self.drawn = np.zeros_like(self.alive)
+        self.animation_index = 0
+        self.animation_timer = self.config.enemy_formation.animation_interval
+
+    def reset_positions(self):
+        self.anchor.topleft = self.start_origin
+
+    def cell_topleft(self, col: int, row: int) -> tuple[int, int]:
+        # Rows grow upwards from the origin
+        return (
+            self.anchor.x + int(col * self.lattice.step_x),
+            self.anchor.y - int(row * self.lattice.step_y),
+        )
+
+    def layer_topleft(self, col: int, row: int) -> tuple[int, int]:
+        """Cell position within the layers, whose top is the last row."""
+        return (
+            int(col * self.lattice.step_x),
+            int((self.enemy_row - 1) * self.lattice.step_y)
+            - int(row * self.lattice.step_y),
+        )
+
+    def point_at(self, col: int, row: int) -> float:
+        return self.row_points[row]
+
+    def redraw_layers(self) -> pygame.Rect | None:
+        """Bring the layers in line with alive, returns the layer area changed."""
+        if np.array_equal(self.drawn, self.alive):
+            return None
+        cell = pygame.Rect((0, 0), self.enemy_size)
+        if (self.alive & ~self.drawn).any():
+            # Cells came back, after a respawn or a restored snapshot
+            for layer in self.layers:
+                layer.fill((0, 0, 0, 0))
+            for index, layer in enumerate(self.layers):
+                layer.blits(
+                    [
+                        (self.row_sprites[row][index], self.layer_topleft(col, row))
+                        for col, row in np.argwhere(self.alive).tolist()
+                    ],
+                    doreturn=False,
+                )
+            changed = pygame.Rect((0, 0), self.layer_size)
+        else:
+            erased = [
+                cell.move(self.layer_topleft(col, row))
+                for col, row in np.argwhere(self.drawn & ~self.alive).tolist()
+            ]
+            for layer in self.layers:
+                for rect in erased:
+                    layer.fill((0, 0, 0, 0), rect)
+            changed = erased[0].unionall(erased)
+        self.drawn[:] = self.alive
+        return changed
+
+    def render(self, surface: pygame.Surface, delta_time: float) -> pygame.Rect | None:
+        changed = self.redraw_layers()
+        if self.animation_timer < 0:
+            self.animation_index = (self.animation_index + 1) % len(self.layers)
+            self.animation_timer = self.config.enemy_formation.animation_interval
+        self.animation_timer -= delta_time
+
+        topleft = self.cell_topleft(0, self.enemy_row - 1)
+        surface.blit(self.layers[self.animation_index], topleft)
+        return changed.move(topleft) if changed is not None else None
@@ -0,0 +1,75 @@
+import pygame
+
+
+class TextLayer:
+    """
+    Cached HUD text.
+
+    Static labels are rendered once per font. Numeric fields are composed
+    from a pre-rendered digit atlas and only re-composed when their value
+    changes, so font rasterization stays out of the frame loop.
+    """
+
+    DIGITS = "0123456789-"
+
+    def __init__(self, color) -> None:
+        self.color = color
+        self.labels: dict[tuple[str, int], pygame.Surface] = {}
+        self.atlases: dict[int, dict[str, pygame.Surface]] = {}
+        # Field name -> (prefix, value, composed surface)
+        self.fields: dict[str, tuple[str, int, pygame.Surface]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def label(self, text: str, font: pygame.font.Font) -> pygame.Surface:
+        key = (text, id(font))
+        surface = self.labels.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.prepare(font.render(text, True, self.color))
+        self.labels[key] = surface
+        return surface
+
+    def field(
+        self, name: str, prefix: str, value: int, font: pygame.font.Font
+    ) -> pygame.Surface:
+        """Label followed by a number, re-composed only when either changes."""
+        cached = self.fields.get(name)
+        if cached is not None and cached[0] == prefix and cached[1] == value:
+            self.hits += 1
+            return cached[2]
+        self.misses += 1
+
+        label = self.label(prefix, font)
+        glyphs = [self.digit_atlas(font)[digit] for digit in str(value)]
+        width = label.get_width() + sum(glyph.get_width() for glyph in glyphs)
+        height = max([label.get_height()] + [glyph.get_height() for glyph in glyphs])
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        # Glyphs never overlap, so copy them instead of blending onto transparency
+        surface.blit(label, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        x = label.get_width()
+        for glyph in glyphs:
+            surface.blit(glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += glyph.get_width()
+
+        surface = self.prepare(surface)
+        self.fields[name] = (prefix, value, surface)
+        return surface
+
+    def digit_atlas(self, font: pygame.font.Font) -> dict[str, pygame.Surface]:
+        atlas = self.atlases.get(id(font))
+        if atlas is None:
+            atlas = {
+                digit: self.prepare(font.render(digit, True, self.color))
+                for digit in self.DIGITS
+            }
+            self.atlases[id(font)] = atlas
+        return atlas
+
+    @staticmethod
+    def prepare(surface: pygame.Surface) -> pygame.Surface:
+        if pygame.display.get_surface() is not None:
+            return surface.convert_alpha()
+        return surface
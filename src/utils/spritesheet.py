@@ -15,19 +15,28 @@ import pygame
 
 class SpriteSheet:
 
-    def __init__(self, filename):
-        """Load the sheet."""
-        try:
-            self.sheet = pygame.image.load(filename).convert()
-        except pygame.error as e:
-            print(f"Unable to load spritesheet image: {filename}")
-            raise SystemExit(e)
+    def __init__(self, filename, image=None):
+        """Load the sheet, or use an already loaded image of it."""
+        if image is not None:
+            self.sheet = image
+        else:
+            try:
+                self.sheet = pygame.image.load(filename)
+            except pygame.error as e:
+                print(f"Unable to load spritesheet image: {filename}")
+                raise SystemExit(e)
+        # Only convert to the display format when there is a display,
+        # so the sheet can also be used by the headless simulation
+        if pygame.display.get_surface() is not None:
+            self.sheet = self.sheet.convert()
 
     def image_at(self, rectangle, colorkey=None):
         """Load a specific image from a specific rectangle."""
         # Loads image from x, y, x+offset, y+offset.
         rect = pygame.Rect(rectangle)
-        image = pygame.Surface(rect.size).convert()
+        image = pygame.Surface(rect.size)
+        if pygame.display.get_surface() is not None:
+            image = image.convert()
         image.blit(self.sheet, (0, 0), rect)
         if colorkey is not None:
             if colorkey == -1:
@@ -0,0 +1,11 @@
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The game's modules import each other as top level modules from src/
+sys.path.insert(0, os.path.join(ROOT, "src"))
+# Asset paths in the config are relative to the repository root
+os.chdir(ROOT)
@@ -0,0 +1,64 @@
+import random
+import numpy as np
+from batch_simulation import BatchSimulation
+from config import Config
+from simulation import Simulation, SimulationInput
+from sprite_manager import SpriteManager
+
+
+def make_engines() -> tuple[Simulation, BatchSimulation]:
+    # The engines draw enemy fire from different generators, so it is left out
+    config = Config().with_overrides(
+        {"enemy_formation.max_bullets": 0, "enemy_formation.respawn_timer_ms": 500}
+    )
+    sprite_manager = SpriteManager(config.asset.spritesheet_path)
+    simulation = Simulation(sprite_manager, config, seed=0)
+    batch = BatchSimulation(1, sprite_manager, config, seed=0)
+    return simulation, batch
+
+
+def test_one_lane_matches_simulation():
+    simulation, batch = make_engines()
+    rng = random.Random(5)
+
+    for tick in range(4000):
+        left, right, fire = rng.random() < 0.3, rng.random() < 0.3, rng.random() < 0.2
+        simulation.step(1 / 60, SimulationInput(left, right, fire))
+        batch.step(1 / 60, np.array([left]), np.array([right]), np.array([fire]))
+
+        formation = simulation.enemy_formation
+        expected = (
+            simulation.player.score,
+            simulation.player.lives,
+            formation.enemy_count,
+            formation.wave_count,
+            len(simulation.player.bullets),
+        )
+        actual = (
+            int(batch.score[0]),
+            int(batch.lives[0]),
+            int(batch.enemy_count[0]),
+            int(batch.wave_count[0]),
+            int(batch.player_bullet_active[0]),
+        )
+        assert actual == expected, f"tick {tick}"
+
+    barrier_pixels = sum(barrier.mask.count() for barrier in simulation.barriers)
+    assert int(batch.barriers.sum()) == barrier_pixels
+
+
+def test_player_bullet_positions_match_bullet_pool():
+    simulation, batch = make_engines()
+    bullets = simulation.player.bullets
+    rng = random.Random(7)
+
+    for tick in range(1000):
+        left, right = rng.random() < 0.4, rng.random() < 0.4
+        simulation.step(1 / 60, SimulationInput(left, right, True))
+        batch.step(1 / 60, np.array([left]), np.array([right]), np.array([True]))
+
+        assert bool(batch.player_bullet_active[0]) == (len(bullets) > 0), f"tick {tick}"
+        if len(bullets) > 0:
+            index = int(np.flatnonzero(bullets.active)[0])
+            expected = (bullets.x[index], bullets.y[index])
+            assert tuple(batch.player_bullet_pos[0]) == expected, f"tick {tick}"
@@ -0,0 +1,29 @@
+import random
+import numpy as np
+from environment import SpaceInvadersEnv
+
+
+def play(env: SpaceInvadersEnv, seed: int, steps: int = 600) -> list[np.ndarray]:
+    observation, _ = env.reset(seed)
+    observations = [observation.copy()]
+    rng = random.Random(0)
+    for _ in range(steps):
+        observation, _, terminated, _, _ = env.step(rng.randrange(env.action_count))
+        observations.append(observation.copy())
+        if terminated:
+            break
+    return observations
+
+
+def test_reset_replays_the_same_episode_in_place():
+    env = SpaceInvadersEnv()
+    simulation = env.simulation
+    first = play(env, seed=5)
+    play(env, seed=6)
+    again = play(env, seed=5)
+
+    assert env.simulation is simulation
+    assert env.info()["tick"] == len(again) - 1
+    assert len(first) == len(again)
+    for index, (expected, actual) in enumerate(zip(first, again)):
+        assert np.array_equal(expected, actual), f"step {index}"
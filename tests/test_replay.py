@@ -0,0 +1,65 @@
+import random
+import snapshot
+from config import Config
+from replay import InputFlag, Replay, ReplayPlayer, ReplayRecorder, apply_frame
+from simulation import Simulation
+from sprite_manager import SpriteManager
+
+FRAMES = 1500
+
+
+def record_session(config: Config, seed: int) -> tuple[Replay, dict[int, bytes]]:
+    """Play a session on jittered frame times, with the state before every frame."""
+    sprite_manager = SpriteManager(config.asset.spritesheet_path)
+    simulation = Simulation(sprite_manager, config, seed=seed)
+    replay = Replay(seed, config)
+    recorder = ReplayRecorder(simulation, replay)
+    rng = random.Random(11)
+    states = {}
+    for index in range(FRAMES):
+        flags = InputFlag(0)
+        for flag in (InputFlag.LEFT, InputFlag.RIGHT, InputFlag.FIRE):
+            if rng.random() < 0.4:
+                flags |= flag
+        if rng.random() < 0.02:
+            flags |= InputFlag.PAUSE
+        # Clock ticks are whole milliseconds around the 60 fps budget
+        delta_us = rng.randint(12, 22) * 1000
+        states[index] = snapshot.capture(simulation)
+        recorder.record(flags, delta_us)
+        apply_frame(simulation, flags, delta_us)
+    states[FRAMES] = snapshot.capture(simulation)
+    return replay, states
+
+
+def test_replay_reproduces_jittered_session(tmp_path):
+    config = Config()
+    replay, states = record_session(config, seed=42)
+    path = str(tmp_path / "session.replay")
+    replay.save(path)
+
+    loaded = Replay.load(path)
+    assert sorted(loaded.keyframes) == [0, 600, 1200]
+    player = ReplayPlayer(loaded, SpriteManager(config.asset.spritesheet_path))
+    simulation = player.run()
+    assert snapshot.capture(simulation) == states[FRAMES]
+
+
+def test_seek_across_keyframe_boundary():
+    config = Config()
+    replay, states = record_session(config, seed=7)
+    player = ReplayPlayer(replay, SpriteManager(config.asset.spritesheet_path))
+
+    # Forward from the start, stepping through the keyframe at 600
+    player.seek(599)
+    assert snapshot.capture(player.simulation) == states[599]
+    player.seek(601)
+    assert snapshot.capture(player.simulation) == states[601]
+    # Forward past a later keyframe restores it instead of stepping
+    player.seek(1300)
+    assert snapshot.capture(player.simulation) == states[1300]
+    # Backwards restores the keyframe at or before the target
+    player.seek(650)
+    assert snapshot.capture(player.simulation) == states[650]
+    player.seek(600)
+    assert snapshot.capture(player.simulation) == states[600]
@@ -0,0 +1,92 @@
+import time
+from config import Config
+from scheduler import Scheduler
+from simulation import Simulation, SimulationInput
+from sprite_manager import SpriteManager
+
+
+def test_timers_fire_in_due_order_and_ties_in_schedule_order():
+    scheduler = Scheduler()
+    fired = []
+    scheduler.schedule(30, lambda: fired.append("late"))
+    scheduler.schedule(10, lambda: fired.append("a"))
+    scheduler.schedule(10, lambda: fired.append("b"))
+    scheduler.schedule(20, lambda: fired.append("middle"))
+    scheduler.schedule(10, lambda: fired.append("c"))
+
+    scheduler.advance(10)
+    assert fired == ["a", "b", "c"]
+    scheduler.advance(100)
+    assert fired == ["a", "b", "c", "middle", "late"]
+    assert len(scheduler) == 0
+
+
+def test_repeating_timer_does_not_drift():
+    scheduler = Scheduler()
+    fired = []
+    scheduler.schedule(5, lambda: fired.append(scheduler.now), repeat_ms=10)
+    for _ in range(10):
+        scheduler.advance(7)
+    # Due at 5, 15, ... 65, each seen on the first 7 ms step at or after it
+    assert fired == [7, 21, 28, 35, 49, 56, 70]
+    for _ in range(133):
+        scheduler.advance(7)
+    # Due every 10 ms up to 995, late steps never push the next one back
+    assert len(fired) == 100
+
+
+def test_cancel():
+    scheduler = Scheduler()
+    fired = []
+    kept = scheduler.schedule(10, lambda: fired.append("kept"))
+    dropped = scheduler.schedule(10, lambda: fired.append("dropped"))
+    assert scheduler.cancel(dropped)
+    assert not scheduler.cancel(dropped)
+    assert not scheduler.is_scheduled(dropped)
+    assert scheduler.is_scheduled(kept)
+
+    scheduler.advance(10)
+    assert fired == ["kept"]
+    assert not scheduler.cancel(kept)
+
+
+def test_cancel_compacts_stale_entries():
+    scheduler = Scheduler()
+    fired = []
+    ids = [
+        scheduler.schedule(index, lambda index=index: fired.append(index))
+        for index in range(200)
+    ]
+    for timer_id in ids[::2] + ids[1:150:2]:
+        scheduler.cancel(timer_id)
+        assert len(scheduler.queue) <= 2 * len(scheduler) + 16
+
+    assert len(scheduler) == 25
+    scheduler.advance(200)
+    assert fired == list(range(151, 200, 2))
+    assert scheduler.queue == []
+
+
+def test_timers_run_on_simulated_time_only():
+    scheduler = Scheduler()
+    fired = []
+    scheduler.schedule(10, lambda: fired.append(True))
+    time.sleep(0.03)
+    scheduler.advance(9)
+    assert fired == []
+    scheduler.advance(1)
+    assert fired == [True]
+
+
+def test_revive_after_death_timer_of_simulated_steps():
+    config = Config()
+    simulation = Simulation(SpriteManager(config.asset.spritesheet_path), config)
+    simulation.handle_player_hit()
+    assert simulation.player.is_dead
+
+    steps = round(simulation.player.death_timer_ms * 60 / 1000)
+    for _ in range(steps - 1):
+        simulation.step(1 / 60, SimulationInput(False, False, False))
+    assert simulation.player.is_dead
+    simulation.step(1 / 60, SimulationInput(False, False, False))
+    assert not simulation.player.is_dead
@@ -0,0 +1,107 @@
+import random
+import pytest
+import main
+import snapshot
+from config import Config
+from replay import InputFlag, apply_frame, headless_tick_us
+from simulation import Simulation
+from snapshot import SnapshotHistory, decode_delta, encode_delta
+from sprite_manager import SpriteManager
+
+FLAGS = [InputFlag.LEFT, InputFlag.RIGHT, InputFlag.FIRE]
+
+
+def make_simulation(config: Config | None = None, seed: int = 0) -> Simulation:
+    if config is None:
+        config = Config()
+    return Simulation(SpriteManager(config.asset.spritesheet_path), config, seed=seed)
+
+
+def random_inputs(count: int, seed: int = 3) -> list[InputFlag]:
+    rng = random.Random(seed)
+    return [
+        InputFlag(sum(flag for flag in FLAGS if rng.random() < 0.4))
+        for _ in range(count)
+    ]
+
+
+def play(simulation: Simulation, inputs: list[InputFlag]):
+    tick_us = headless_tick_us(simulation.config)
+    for flags in inputs:
+        apply_frame(simulation, flags, tick_us)
+
+
+def test_capture_restore_capture_is_identical():
+    simulation = make_simulation()
+    play(simulation, random_inputs(300))
+    data = snapshot.capture(simulation)
+
+    other = make_simulation(seed=99)
+    snapshot.restore(other, data)
+    assert snapshot.capture(other) == data
+
+
+def test_delta_round_trips():
+    simulation = make_simulation()
+    base = snapshot.capture(simulation)
+    play(simulation, random_inputs(120))
+    data = snapshot.capture(simulation)
+
+    assert decode_delta(base, encode_delta(base, data)) == data
+    # Snapshots grow and shrink with the bullets in flight
+    assert decode_delta(base, encode_delta(base, data[:-7])) == data[:-7]
+    assert decode_delta(data[:-7], encode_delta(data[:-7], data)) == data
+
+
+def test_history_returns_every_capture():
+    simulation = make_simulation()
+    history = SnapshotHistory(capacity=1000, keyframe_interval=16)
+    captures = []
+    for flags in random_inputs(100):
+        play(simulation, [flags])
+        history.capture(simulation)
+        captures.append(snapshot.capture(simulation))
+
+    for data in reversed(captures):
+        assert history.pop() == data
+    assert len(history) == 0
+
+
+def test_rewind_and_resimulate_reproduces_state():
+    simulation = make_simulation()
+    history = SnapshotHistory(capacity=1000, keyframe_interval=16)
+    inputs = random_inputs(400)
+    for flags in inputs:
+        play(simulation, [flags])
+        history.capture(simulation)
+    expected = snapshot.capture(simulation)
+
+    rewound = 150
+    assert history.rewind(simulation, rewound)
+    assert simulation.tick == len(inputs) - rewound
+    play(simulation, inputs[-rewound:])
+    assert snapshot.capture(simulation) == expected
+
+
+def test_load_rejects_mismatched_config(tmp_path):
+    path = str(tmp_path / "quicksave.sav")
+    snapshot.save(path, make_simulation())
+
+    simulation = make_simulation(Config().with_overrides({"player.lives": 5}))
+    before = snapshot.capture(simulation)
+    with pytest.raises(ValueError, match="different config"):
+        snapshot.load(path, simulation)
+    assert snapshot.capture(simulation) == before
+
+
+def test_quickload_keeps_game_on_mismatched_config(tmp_path, monkeypatch):
+    path = str(tmp_path / "quicksave.sav")
+    monkeypatch.setattr(main, "QUICKSAVE_PATH", path)
+    snapshot.save(path, make_simulation())
+
+    game = main.Game(Config().with_overrides({"player.lives": 5}))
+    game.finish_loading(wait=True)
+    play(game.simulation, random_inputs(60))
+    before = snapshot.capture(game.simulation)
+    game.quickload()
+    assert snapshot.capture(game.simulation) == before